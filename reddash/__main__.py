@@ -7,39 +7,13 @@
 
 import argparse
 import asyncio
-import logging
 
-import rich
 from rich import columns
-from rich import logging as rich_logging
 from rich import panel, progress, rule
 from rich import table as rtable
-from rich.console import Console
-from rich.style import Style
-from rich.theme import Theme
 
 from .app import FlaskApp
-
-rich_console: Console = rich.get_console()
-logging.basicConfig(
-    format="[{asctime}] {name}: {message}",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    style="{",
-    handlers=[rich_logging.RichHandler(console=rich_console, rich_tracebacks=True)],
-)
-rich_console.push_theme(
-    Theme(
-        {
-            "log.time": Style(dim=True),
-            "logging.level.warning": Style(color="yellow"),
-            "logging.level.critical": Style(color="white", bgcolor="red"),
-            "logging.level.verbose": Style(color="magenta", italic=True, dim=True),
-            "logging.level.trace": Style(color="white", italic=True, dim=True),
-            "repr.number": Style(color="cyan"),
-            "repr.url": Style(underline=True, italic=True, bold=False, color="cyan"),
-        }
-    )
-)
+from .logs import LOG_FORMATS, setup_logging
 
 parser: argparse.ArgumentParser = argparse.ArgumentParser()
 parser.add_argument("--host", dest="host", type=str, default="0.0.0.0")
@@ -47,11 +21,39 @@
 parser.add_argument("--rpc-port", dest="rpc_port", type=int, default=6133)
 parser.add_argument("--interval", dest="interval", type=int, default=5, help=argparse.SUPPRESS)
 parser.add_argument("--development", dest="dev", action="store_true", help=argparse.SUPPRESS)
+parser.add_argument(
+    "--webhooks-spool",
+    dest="webhooks_spool",
+    type=str,
+    default=None,
+    help="Append-only file keeping the received webhooks until they are forwarded to the bot.",
+)
+parser.add_argument(
+    "--metrics-token",
+    dest="metrics_token",
+    type=str,
+    default=None,
+    help="Let the Prometheus scrapers sending `Authorization: Bearer <token>` read the metrics, otherwise kept for the bot owners.",
+)
+parser.add_argument(
+    "--metrics-allow-localhost",
+    dest="metrics_allow_localhost",
+    action="store_true",
+    help="Let any local request read the metrics. Not to be used behind a local reverse proxy, whose requests all come from localhost.",
+)
+parser.add_argument(
+    "--log-format",
+    dest="log_format",
+    choices=LOG_FORMATS,
+    default="rich",
+    help="Rich console output for interactive runs, or plain/JSON lines for log collectors.",
+)
 # parser.add_argument("--debug", dest="debug", action="store_true")
 
 
 async def _main():
     args = vars(parser.parse_args())
+    setup_logging(args.pop("log_format"))
     app: FlaskApp = FlaskApp(cog=None, **args)
 
     table = rtable.Table(title="Settings")
@@ -0,0 +1,13 @@
+# -*- encoding: utf-8 -*-
+"""
+License: MIT
+Copyright (c) 2019 - present AppSeed.us
+"""
+
+from flask import Blueprint
+
+blueprint = Blueprint(
+    "api_blueprint",
+    __name__,
+    url_prefix="/api",
+)
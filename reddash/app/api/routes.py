@@ -0,0 +1,226 @@
+import typing  # isort:skip
+
+import functools
+import hmac
+
+from reddash.app.app import app
+
+from flask import Response, abort, jsonify, request
+from flask_babel import _
+from flask_login import current_user
+
+from ..base.routes import GUILD_ACCESS_CACHE, get_roles_choices, update_guild_access
+from ..cache import LRUCache
+from ..utils import get_result
+from . import blueprint
+
+
+def api_login_required(func: typing.Callable) -> typing.Callable:
+    # Same session authentication as the HTML views, but without the redirection to the login page.
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return jsonify({"status": 1, "message": "Not authenticated."}), 401
+        return await func(*args, **kwargs)
+
+    return wrapper
+
+
+def project_fields(data: typing.Dict[str, typing.Any], fields: typing.Optional[str]) -> typing.Dict[str, typing.Any]:
+    # `fields=id,name,settings.prefixes` keeps only these keys, dotted paths selecting nested keys.
+    if not fields:
+        return data
+    projected = {}
+    for field in fields.split(","):
+        source, target = data, projected
+        *parents, last = field.strip().split(".")
+        for parent in parents:
+            if not isinstance(source.get(parent), typing.Dict):
+                break
+            source = source[parent]
+            target = target.setdefault(parent, {})
+        else:
+            if last in source:
+                target[last] = source[last]
+    return projected
+
+
+# Last ETag sent for each user and URL: polls repeating it within `API_ETAG_TTL` are answered without any RPC call.
+API_ETAGS_CACHE: LRUCache = LRUCache("api_etags", maxsize=1024)
+
+
+def set_api_cache_headers(response: Response) -> Response:
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add("Cookie")
+    return response
+
+
+def get_not_modified_response() -> typing.Optional[Response]:
+    etag = API_ETAGS_CACHE.get((current_user.id, request.full_path))
+    if etag is None or etag not in request.if_none_match:
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    return set_api_cache_headers(response)
+
+
+def make_api_response(data: typing.Dict[str, typing.Any]) -> Response:
+    response = jsonify(data)
+    response.add_etag()
+    API_ETAGS_CACHE.set(
+        (current_user.id, request.full_path), response.get_etag()[0], ttl=app.config["API_ETAG_TTL"]
+    )
+    return set_api_cache_headers(response).make_conditional(request)
+
+
+def make_rpc_error_response(result: typing.Dict[str, typing.Any]) -> typing.Tuple[Response, int]:
+    if result.get("error") == _("Not connected to bot."):
+        return jsonify({"status": 1, "message": result["error"]}), 503
+    return jsonify({"status": 1, "message": "Guild not found or missing access to it."}), 404
+
+# <---------- Metrics ---------->
+
+
+@blueprint.route("/metrics")
+async def metrics():
+    # Kept for the bot owners, unless a scraper is allowed by the `--metrics-token` or `--metrics-allow-localhost` options.
+    if not (
+        (current_user.is_authenticated and current_user.is_owner)
+        or (
+            (token := app.config["METRICS_TOKEN"])
+            and hmac.compare_digest(request.headers.get("Authorization", "").encode(), f"Bearer {token}".encode())
+        )
+        or (app.config["METRICS_ALLOW_LOCALHOST"] and request.remote_addr in ("127.0.0.1", "::1"))
+    ):
+        return abort(403)
+    return Response(app.metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+# <---------- Events Stream ---------->
+
+
+def get_stream_snapshot() -> typing.Dict[str, typing.Any]:
+    return {
+        "rpc_state": {"connected": app.config["RPC_CONNECTED"]},
+    }
+
+
+@blueprint.route("/stream")
+@api_login_required
+async def stream():
+    # Each client holds a webserver thread: the stream is kept for the bot owners, on the admin page.
+    if not current_user.is_owner:
+        return jsonify({"status": 1, "message": "Forbidden."}), 403
+    subscriber = app.events_broadcaster.subscribe()
+    if subscriber is None:
+        # `EventSource` doesn't reconnect after an error status, but does after a stream ending normally.
+        return Response(
+            "retry: 60000\n\n",
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    return Response(
+        app.events_broadcaster.stream(
+            subscriber,
+            initial_events=get_stream_snapshot(),
+            max_duration=app.config["STREAM_MAX_DURATION"],
+        ),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# <---------- Guilds ---------->
+
+
+@blueprint.route("/v1/guilds")
+@api_login_required
+async def guilds():
+    if (response := get_not_modified_response()) is not None:
+        return response
+    requeststr = {
+        "jsonrpc": "2.0",
+        "id": 0,
+        "method": "DASHBOARDRPC__GET_USER_GUILDS",
+        "params": [
+            current_user.id,
+            request.args.get("per_page"),
+            request.args.get("page"),
+            request.args.get("query"),
+            request.args.get("filter"),
+        ],
+    }
+    if "cursor" in request.args:
+        requeststr["params"].append(request.args["cursor"])
+    with app.lock:
+        result = await get_result(app, requeststr)
+    if "items" not in result:
+        return jsonify({"status": 1, "message": result.get("error", "Something went wrong.")}), 503
+    fields = request.args.get("fields")
+    result["items"] = [project_fields(guild, fields) for guild in result["items"]]
+    return make_api_response(result)
+
+
+@blueprint.route("/v1/guilds/<int:guild_id>")
+@api_login_required
+async def guild(guild_id: int):
+    if (response := get_not_modified_response()) is not None:
+        return response
+    requeststr = {
+        "jsonrpc": "2.0",
+        "id": 0,
+        "method": "DASHBOARDRPC__GET_GUILD",
+        "params": [current_user.id, guild_id, False],
+    }
+    with app.lock:
+        result = await get_result(app, requeststr)
+    update_guild_access(guild_id, result)
+    if result.get("status") == 1:
+        return make_rpc_error_response(result)
+    return make_api_response(project_fields(result, request.args.get("fields")))
+
+
+# Only the roles are shared by the users: the access of each one is checked by `GUILD_ACCESS_CACHE`.
+GUILD_ROLES_CACHE: LRUCache = LRUCache("guild_roles", maxsize=256, ttl=60)
+
+
+@blueprint.route("/v1/guilds/<int:guild_id>/roles")
+@api_login_required
+async def guild_roles(guild_id: int):
+    if (current_user.id, guild_id) not in GUILD_ACCESS_CACHE or (
+        roles_choices := GUILD_ROLES_CACHE.get(guild_id)
+    ) is None:
+        requeststr = {
+            "jsonrpc": "2.0",
+            "id": 0,
+            "method": "DASHBOARDRPC__GET_GUILD",
+            "params": [current_user.id, guild_id, False],
+        }
+        with app.lock:
+            result = await get_result(app, requeststr)
+        update_guild_access(guild_id, result)
+        if result.get("status") == 1:
+            return make_rpc_error_response(result)
+        if "roles" not in result:
+            GUILD_ACCESS_CACHE.pop((current_user.id, guild_id))
+            return jsonify({"status": 1, "message": result.get("error", "Something went wrong.")}), 503
+        roles_choices = get_roles_choices(result)
+        GUILD_ROLES_CACHE.set(guild_id, roles_choices)
+
+    query = request.args.get("query", "").strip().lower()
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = min(max(request.args.get("per_page", 50, type=int), 1), 100)
+    values = [value for value, label in roles_choices["search"] if query in label]
+    start = (page - 1) * per_page
+    return make_api_response(
+        {
+            "items": [
+                {"value": value, "label": roles_choices["labels"][value]}
+                for value in values[start : start + per_page]
+            ],
+            "page": page,
+            "per_page": per_page,
+            "total": len(values),
+        }
+    )
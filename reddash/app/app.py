@@ -8,11 +8,16 @@
 
 import base64
 import datetime
+import inspect
 import logging
+import mimetypes
+import os
+import secrets
 import sys
 import threading
+import time
 
-from flask import Flask
+from flask import Flask, Response, g, has_request_context, request, send_from_directory
 from flask_babel import Babel, _
 from flask_bootstrap import Bootstrap
 from flask_login import LoginManager
@@ -20,18 +25,26 @@
 from flask_sitemapper import Sitemapper
 from flask_talisman import Talisman
 from flask_wtf.csrf import CSRFProtect
-from markdown import Markdown
-from waitress import serve
+from jinja2 import FileSystemBytecodeCache
+from waitress import create_server
+from waitress.server import BaseWSGIServer as WaitressServer
+from waitress.server import MultiSocketServer
 from werkzeug.serving import BaseWSGIServer, make_server
 
+from .events import EventsBroadcaster
+from .metrics import Metrics, record_timing, timed
+from .profiling import Profiler
 from .tasks_manager import TasksManager
 from .utils import (
+    COMPRESSIBLE_EXTENSIONS,
     add_constants,
     apply_themes,
     initialize_babel,
+    precompile_templates,
     register_blueprints,
     register_extensions,
 )  # NOQA
+from .webhooks import WebhooksQueue
 
 
 class Lock:
@@ -39,7 +52,9 @@ def __init__(self) -> None:
         self.lock: threading.Lock = threading.Lock()
 
     def __enter__(self) -> None:
+        start = time.perf_counter()
         self.lock.acquire()
+        record_timing("lock", time.perf_counter() - start)
 
     def __exit__(self, *args) -> None:
         self.lock.release()
@@ -68,6 +83,9 @@ def __init__(
         rpc_port: int = 6133,
         interval: int = 5,
         dev: bool = False,
+        webhooks_spool: typing.Optional[str] = None,
+        metrics_token: typing.Optional[str] = None,
+        metrics_allow_localhost: bool = False,
     ) -> None:  # debug: bool = False,
         super().__init__(import_name=__name__, static_folder="static", template_folder="templates")
 
@@ -77,6 +95,9 @@ def __init__(
         self.rpc_port: int = rpc_port
         self.interval: int = interval
         self.dev: bool = dev
+        self.webhooks_spool: typing.Optional[str] = webhooks_spool
+        self.metrics_token: typing.Optional[str] = metrics_token
+        self.metrics_allow_localhost: bool = metrics_allow_localhost
         self.testing = self.debug = self.dev
 
         self.lock: Lock = Lock()
@@ -85,6 +106,18 @@ def __init__(
         self.tasks_manager: TasksManager = TasksManager(self)
         self.data: typing.Dict[str, typing.Any] = {}
         self.variables: typing.Dict[str, typing.Any] = {}
+        self.data_versions: typing.Dict[str, int] = {}
+        self.variables_versions: typing.Dict[str, int] = {}
+        # The versions restart from scratch with each process: the ETags built on them also include this.
+        self.boot_id: str = secrets.token_hex(8)
+        self.custom_pages: typing.Dict[str, typing.Dict[str, typing.Any]] = {}
+        self.assets_manifest: typing.Dict[str, str] = {}
+        self.compressed_assets: typing.Dict[str, typing.Dict[str, str]] = {}
+        self.webhooks_queue: WebhooksQueue = None
+        self.events_broadcaster: EventsBroadcaster = EventsBroadcaster()
+        self.metrics: Metrics = Metrics()
+        self.profiler: Profiler = Profiler()
+        self.server: typing.Union[WaitressServer, MultiSocketServer] = None
         self.server_thread: ServerThread = None
 
         self.login_manager: LoginManager = None
@@ -92,7 +125,6 @@ def __init__(
         self.csrf_protect: CSRFProtect = None
         self.bootstrap: Bootstrap = None
         self.moment: Moment = None
-        self.markdown: Markdown = None
         self.site_mapper: Sitemapper = None
 
         self.logger: logging.Logger = logging.getLogger("reddash")
@@ -113,8 +145,10 @@ async def create_app(self) -> None:
         # Initialize core variables.
         self.running: bool = True
         self.config.from_object(__name__)
-        self.config["ASSETS_ROOT"]: str = "/static/assets"
-        self.config["TEMPLATES_AUTO_RELOAD"]: bool = True
+        self.config["TEMPLATES_AUTO_RELOAD"]: bool = self.dev
+        self.jinja_env.auto_reload = self.dev
+        # Compiled templates are kept on disk, so a restart doesn't compile them again.
+        self.jinja_env.bytecode_cache = FileSystemBytecodeCache(pattern="reddash-%s.cache")
         self.config["MAX_CONTENT_LENGTH"]: int = 16 * 1024 * 1024  # 16MB
 
         self.config["WEBSOCKET_HOST"]: str = "localhost"
@@ -123,6 +157,32 @@ async def create_app(self) -> None:
         self.config["RPC_CONNECTED"]: bool = False
         self.config["LAUNCH"]: datetime.datetime = datetime.datetime.now(tz=datetime.timezone.utc)
         self.config["LAST_RPC_EVENT"]: datetime.datetime = self.config["LAUNCH"]
+        self.config["WEBHOOKS_QUEUE_SIZE"]: int = 1000
+        # Webhooks taken from the queue at once, and acknowledged together in the spool file.
+        self.config["WEBHOOKS_BATCH_SIZE"]: int = 50
+        self.config["WEBHOOKS_MAX_ATTEMPTS"]: int = 5
+        # Each stream client holds one of the 10 webserver threads, so the stream is only opened by the bot owners.
+        self.config["STREAM_MAX_SUBSCRIBERS"]: int = 4
+        self.config["STREAM_MAX_DURATION"]: int = 30 * 60
+        # `/api/metrics` is kept for the bot owners, unless a scraper sends this bearer token.
+        self.config["METRICS_TOKEN"]: typing.Optional[str] = self.metrics_token
+        # Waitress drops the `X-Forwarded-For` headers, so behind a local reverse proxy, every request would be trusted.
+        self.config["METRICS_ALLOW_LOCALHOST"]: bool = self.metrics_allow_localhost
+        # Delay before the changes made outside of the dashboard show up in the polls of the JSON API.
+        self.config["API_ETAG_TTL"]: int = 10
+        # `Server-Timing` headers are always sent to the bot owners.
+        self.config["SERVER_TIMING"]: bool = self.dev
+        self.config["SLOW_REQUEST_THRESHOLD"]: float = 2.0
+        # Profile 1 request out of N, in addition to the owners' `?profile=1` (0 to disable).
+        self.config["PROFILING_SAMPLE_RATE"]: int = 0
+        # Guilds with more roles get role pickers loading their options on demand.
+        self.config["ROLES_TYPEAHEAD_THRESHOLD"]: int = 250
+        self.events_broadcaster.max_subscribers = self.config["STREAM_MAX_SUBSCRIBERS"]
+        self.webhooks_queue: WebhooksQueue = WebhooksQueue(
+            maxsize=self.config["WEBHOOKS_QUEUE_SIZE"],
+            spool_path=self.webhooks_spool,
+            logger=self.logger,
+        )
         await self.tasks_manager.update_data_variables("DASHBOARDRPC__GET_DATA")
         await self.tasks_manager.update_data_variables(
             "DASHBOARDRPC__GET_VARIABLES", only_bot_variables=True
@@ -141,11 +201,51 @@ async def create_app(self) -> None:
         self.jwt_secret_key: bytes = jwt_secret_key
 
         # Initialize core app functions.
+        self.metrics.init_app(self)
+        self.profiler.init_app(self)
         register_extensions(self)
         register_blueprints(self)
         apply_themes(self)
         add_constants(self)
         initialize_babel(self)
+        if not self.dev:
+            precompile_templates(self)
+
+    def ensure_sync(self, func: typing.Callable) -> typing.Callable:
+        # Views are wrapped by sync decorators (`login_required`...), so the first coroutine of the request is profiled.
+        if (
+            inspect.iscoroutinefunction(func)
+            and has_request_context()
+            and "profiled" not in g
+            and self.profiler.should_profile()
+        ):
+            g.profiled = True
+            func = self.profiler.wrap(func)
+        return super().ensure_sync(func)
+
+    def update_template_context(self, context: typing.Dict[str, typing.Any]) -> None:
+        with timed("context"):
+            super().update_template_context(context)
+
+    def send_static_file(self, filename: str) -> Response:
+        # Serve the variant precompressed at startup if the client accepts it.
+        for encoding in ("br", "gzip"):
+            if (
+                compressed_filename := self.compressed_assets.get(encoding, {}).get(filename)
+            ) is not None and request.accept_encodings[encoding]:
+                response = send_from_directory(
+                    os.path.join(self.instance_path, "compressed_static"),
+                    compressed_filename,
+                    mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+                    max_age=self.get_send_file_max_age(filename),
+                )
+                response.content_encoding = encoding
+                break
+        else:
+            response = super().send_static_file(filename)
+        if filename.endswith(COMPRESSIBLE_EXTENSIONS):
+            response.vary.add("Accept-Encoding")
+        return response
 
     async def run_app(self) -> None:
         self.logger.info("Webserver started.")
@@ -166,14 +266,15 @@ async def run_app(self) -> None:
                 if self.dev:
                     self.run(host=self.host, port=self.port, debug=True, threaded=True)
                 else:
-                    serve(
+                    # The server is kept to export its queue depth in the metrics.
+                    self.server: typing.Union[WaitressServer, MultiSocketServer] = create_server(
                         self,
                         host=self.host,
                         port=self.port,
-                        _quiet=True,
                         threads=10,
                         clear_untrusted_proxy_headers=True,
                     )
+                    self.server.run()
             except KeyboardInterrupt:
                 pass
             finally:
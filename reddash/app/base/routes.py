@@ -2,6 +2,9 @@
 
 import base64
 import datetime
+import hashlib
+import json
+import time
 from copy import deepcopy
 
 from reddash.app.app import app
@@ -10,6 +13,7 @@
 from babel import UnknownLocaleError
 from django.utils.http import url_has_allowed_host_and_scheme
 from flask import (
+    Response,
     abort,
     flash,
     jsonify,
@@ -28,11 +32,22 @@
 import wtforms
 from markupsafe import Markup
 
-from ..utils import AVAILABLE_COLORS, User, get_result, humanize_timedelta
+from ..cache import LRUCache
+from ..forms import DashboardForm, escape_choice
+from ..utils import (
+    AVAILABLE_COLORS,
+    HIGHLIGHT_CSS,
+    User,
+    get_commands_choices,
+    get_result,
+    humanize_timedelta,
+    index_custom_pages,
+    render_template_stream,
+)
 from . import blueprint
 
 current_user: User
-from ..pagination import Pagination
+from ..pagination import CursorPagination, Pagination
 
 # <--------- Index ---------->
 
@@ -105,6 +120,16 @@ async def robots():
     return app.send_static_file("assets/robots.txt")
 
 
+@blueprint.route("/highlight.css")
+async def highlight_css():
+    response = make_response(HIGHLIGHT_CSS)
+    response.mimetype = "text/css"
+    response.add_etag()
+    response.cache_control.public = True
+    response.cache_control.max_age = 60 * 60 * 24 * 7
+    return response.make_conditional(request)
+
+
 # For CertBot, to allow creating a SSL certificate.
 app.add_url_rule(
     "/.well-known/<path:filename>",
@@ -165,7 +190,7 @@ def check_subs(subs):
         cogs[_cog] = _cog_data
     prefixes = app.variables["bot"]["prefixes"]
 
-    return render_template(
+    return render_template_stream(
         "pages/commands.html",
         cogs=cogs,
         prefixes=sorted(prefixes, key=len),
@@ -192,10 +217,17 @@ async def dashboard():
             request.args.get("filter"),
         ],
     }
+    if "cursor" in request.args:
+        # Only sent back to a bot which already answered with a cursor-based pagination.
+        requeststr["params"].append(request.args["cursor"])
     with app.lock:
         result = await get_result(app, requeststr)
 
-    guilds = Pagination(result.pop("items"), **result)
+    guilds = (
+        CursorPagination(result.pop("items"), **result)
+        if CursorPagination.is_cursor_paginated(result)
+        else Pagination(result.pop("items"), **result)
+    )
 
     redirecting_to: str = (
         request.args.get("next") if not app.config["USE_SESSION_FOR_NEXT"] else session.get("next")
@@ -213,13 +245,25 @@ async def dashboard():
     )
 
 
-class LeaveGuildForm(FlaskForm):
+class LeaveGuildForm(DashboardForm):
     def __init__(self) -> None:
         super().__init__(prefix="leave_guild_form_")
 
     submit: wtforms.SubmitField = wtforms.SubmitField(_("Leave Guild"))
 
 
+# Access of the users to the guilds, as checked by their last `GET_GUILD` call: trusted for a short time by the roles
+# typeahead, and forgotten as soon as a call fails.
+GUILD_ACCESS_CACHE: LRUCache = LRUCache("guild_access", maxsize=1024, ttl=15)
+
+
+def update_guild_access(guild_id: int, result: typing.Dict[str, typing.Any]) -> None:
+    if result.get("status") == 1:
+        GUILD_ACCESS_CACHE.pop((current_user.id, guild_id))
+    else:
+        GUILD_ACCESS_CACHE.set((current_user.id, guild_id), True)
+
+
 async def get_guild(guild_id: int, for_third_parties: bool = False):
     requeststr = {
         "jsonrpc": "2.0",
@@ -229,6 +273,7 @@ async def get_guild(guild_id: int, for_third_parties: bool = False):
     }
     with app.lock:
         guild = await get_result(app, requeststr)
+    update_guild_access(guild_id, guild)
     if guild["status"] == 1:
         return abort(404, description=_("Guild not found or missing access to it."))
     guild["created_at"] = datetime.datetime.fromtimestamp(
@@ -312,7 +357,66 @@ def __call__(self, form: FlaskForm, field: wtforms.Field) -> None:
         field.data = f"{locale.language}-{locale.territory}"
 
 
-class GuildSettingsForm(FlaskForm):
+ROLES_CHOICES_CACHE: LRUCache = LRUCache("roles_choices", maxsize=64)
+
+
+def get_roles_choices(guild: typing.Dict[str, typing.Any]) -> typing.Dict[str, typing.Any]:
+    # Sanitized once per version of the guild roles, instead of for each option of each rendering.
+    roles = guild["roles"][1:]  # Without `@everyone`.
+    digest = hashlib.sha1(
+        "\n".join(f"{role['id']}\t{role['name']}" for role in roles).encode()
+    ).hexdigest()
+    key = (guild["id"], digest)
+    if (roles_choices := ROLES_CHOICES_CACHE.get(key)) is not None:
+        return roles_choices
+    labels = {
+        str(role["id"]): escape_choice(f"{role['name']} ({role['id']})")
+        for role in roles
+    }
+    roles_choices = {
+        "choices": list(labels.items()),
+        "labels": labels,
+        "search": [(str(role["id"]), f"{role['name']} ({role['id']})".lower()) for role in roles],
+    }
+    ROLES_CHOICES_CACHE.set(key, roles_choices)
+    return roles_choices
+
+
+class RolesField(wtforms.SelectMultipleField):
+    # For large guilds, only the selected roles are rendered: the others are loaded with the typeahead endpoint.
+    choices_sanitized: bool = True
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, choices=[], **kwargs)
+        self.labels: typing.Dict[str, str] = {}
+        self.lazy: bool = False
+
+    def set_roles(self, guild: typing.Dict[str, typing.Any], selected: typing.List[str]) -> None:
+        roles_choices = get_roles_choices(guild)
+        self.choices = roles_choices["choices"]
+        self.labels = roles_choices["labels"]
+        self.default = selected
+        self.lazy = len(self.labels) > app.config["ROLES_TYPEAHEAD_THRESHOLD"]
+        if self.lazy:
+            self.render_kw = {
+                **(self.render_kw or {}),
+                "data-typeahead-url": url_for("api_blueprint.guild_roles", guild_id=guild["id"]),
+            }
+
+    def iter_choices(self) -> typing.Iterator[typing.Tuple[str, str, bool, typing.Dict]]:
+        if not self.lazy:
+            return super().iter_choices()
+        selected = self.data if self.data is not None else self.default or []
+        return self._choices_generator(
+            [(value, self.labels[value]) for value in selected if value in self.labels]
+        )
+
+    def pre_validate(self, form: FlaskForm) -> None:
+        if self.data and any(value not in self.labels for value in self.data):
+            raise wtforms.validators.ValidationError(self.gettext("Not a valid choice."))
+
+
+class GuildSettingsForm(DashboardForm):
     def __init__(self, guild: typing.Dict[str, typing.Any]) -> None:
         super().__init__(prefix="guild_settings_form_")
         if not guild["settings"]["edit_permission"]:
@@ -320,35 +424,12 @@ def __init__(self, guild: typing.Dict[str, typing.Any]) -> None:
                 field.render_kw = {"disabled": True}
         self.bot_nickname.default = guild["settings"]["bot_nickname"]
         self.prefixes.default = ";;|;;".join(guild["settings"]["prefixes"])
-        self.admin_roles.choices = [
-            (str(role["id"]), f"{role['name']} ({role['id']})") for role in guild["roles"][1:]
-        ]
-        self.admin_roles.default = [str(role["id"]) for role in guild["settings"]["admin_roles"]]
-        self.mod_roles.choices = [
-            (str(role["id"]), f"{role['name']} ({role['id']})") for role in guild["roles"][1:]
-        ]
-        self.mod_roles.default = [str(role["id"]) for role in guild["settings"]["mod_roles"]]
+        self.admin_roles.set_roles(
+            guild, [str(role["id"]) for role in guild["settings"]["admin_roles"]]
+        )
+        self.mod_roles.set_roles(guild, [str(role["id"]) for role in guild["settings"]["mod_roles"]])
         self.ignored.default = self.ignored.checked = guild["settings"]["ignored"]
-        available_commands = []
-        all_commands = deepcopy(app.variables["commands"])
-        for cog_data in all_commands.values():
-            for command in cog_data["commands"]:
-                if command["privilege_level"] == "BOT_OWNER" or command["name"] == "command":
-                    continue
-                available_commands.append((command["name"], command["name"]))
-
-                def check_subs(subs):
-                    _subs = []
-                    for sub in subs:
-                        if sub["privilege_level"] == "BOT_OWNER":
-                            continue
-                        available_commands.append((sub["name"], sub["name"]))
-                        if sub["subs"]:
-                            check_subs(sub["subs"])
-                    return _subs
-
-                check_subs(command["subs"])
-        self.disabled_commands.choices = sorted(available_commands)
+        self.disabled_commands.choices = get_commands_choices()
         self.disabled_commands.default = guild["settings"]["disabled_commands"].copy()
         self.embeds.default = self.embeds.checked = guild["settings"]["embeds"]
         self.use_bot_color.default = self.use_bot_color.checked = guild["settings"]["use_bot_color"]
@@ -363,12 +444,8 @@ def check_subs(subs):
     prefixes: wtforms.StringField = wtforms.StringField(
         _("Prefixes:"), validators=[wtforms.validators.Optional(), PrefixesCheck()]
     )
-    admin_roles: wtforms.SelectMultipleField = wtforms.SelectMultipleField(
-        _("Admin Roles:"), choices=[]
-    )
-    mod_roles: wtforms.SelectMultipleField = wtforms.SelectMultipleField(
-        _("Mod Roles:"), choices=[]
-    )
+    admin_roles: RolesField = RolesField(_("Admin Roles:"))
+    mod_roles: RolesField = RolesField(_("Mod Roles:"))
     ignored: wtforms.BooleanField = wtforms.BooleanField(_("Ignore commands in this guild."))
     disabled_commands: wtforms.SelectMultipleField = wtforms.SelectMultipleField(
         _("Disabled Commands:"), choices=[]
@@ -413,28 +490,207 @@ def __call__(
         return super().__call__(**kwargs)
 
 
-class AliasForm(FlaskForm):
+def get_custom_command_responses(responses: typing.Union[str, typing.List[str]]) -> typing.List[str]:
+    return [responses] if isinstance(responses, str) else list(responses)
+
+
+def get_entries_pagination(entries: typing.Dict[str, typing.Any], name: str) -> Pagination:
+    # Only one page of the aliases or custom commands is rendered, optionally filtered with `<name>_query`.
+    query = request.args.get(f"{name}_query", "").strip().lower()
+    return Pagination.from_list(
+        (
+            (key, value)
+            for key, value in entries.items()
+            if not query
+            or query in key.lower()
+            or any(query in text.lower() for text in ([value] if isinstance(value, str) else value))
+        ),
+        per_page=request.args.get(f"{name}_per_page"),
+        page=request.args.get(f"{name}_page"),
+    )
+
+
+def get_entries_diff(
+    current: typing.Dict[str, typing.Any],
+    displayed: typing.Optional[str],
+    submitted: typing.Dict[str, typing.Any],
+    normalize: typing.Callable[[typing.Any], typing.Any] = lambda value: value,
+) -> typing.Tuple[typing.Dict[str, typing.Any], typing.List[str]]:
+    # The entries of the page missing from the submitted ones have been deleted (or renamed).
+    try:
+        displayed = json.loads(displayed or "[]")
+    except ValueError:
+        displayed = []
+    changed = {
+        key: value
+        for key, value in submitted.items()
+        if key not in current or normalize(current[key]) != normalize(value)
+    }
+    removed = [key for key in displayed if key in current and key not in submitted]
+    return changed, removed
+
+
+async def edit_entries(
+    guild_id: int,
+    edit_method: str,
+    set_method: str,
+    current: typing.Dict[str, typing.Any],
+    changed: typing.Dict[str, typing.Any],
+    removed: typing.List[str],
+) -> typing.Optional[typing.Dict[str, typing.Any]]:
+    # Only the modifications are sent, with the whole set as a fallback for the bots without the `EDIT_` methods.
+    if not changed and not removed:
+        return None
+    requeststr = {
+        "jsonrpc": "2.0",
+        "id": 0,
+        "method": edit_method,
+        "params": [current_user.id, guild_id, changed, removed],
+    }
+    result = await get_result(app, requeststr)
+    if result.get("method_not_found"):
+        removed = set(removed)
+        requeststr = {
+            "jsonrpc": "2.0",
+            "id": 0,
+            "method": set_method,
+            "params": [
+                current_user.id,
+                guild_id,
+                {**{key: value for key, value in current.items() if key not in removed}, **changed},
+            ],
+        }
+        result = await get_result(app, requeststr)
+    return result
+
+
+def flash_edit_result(result: typing.Optional[typing.Dict[str, typing.Any]]) -> None:
+    if result is None:
+        flash(_("No modifications to save."), category="info")
+    elif result["status"] == 0:
+        flash(_("Successfully saved the modifications."), category="success")
+    else:
+        for error in result.get("errors", []):
+            flash(error, category="warning")
+        flash(_("Failed to save the modifications."), category="danger")
+
+
+def get_modified_settings(
+    loaded: typing.Dict[str, typing.Any],
+    submitted: typing.Dict[str, typing.Any],
+    ordered_keys: typing.Iterable[str] = ("prefixes",),
+) -> typing.Dict[str, typing.Any]:
+    # Empty fields are sent as `None` or `""` depending on the field, and both mean "not set".
+    # The multiple selects don't keep the order of their values: only the lists of `ordered_keys` are compared in order.
+    def normalize(key: str, value: typing.Any) -> typing.Any:
+        if value == "":
+            return None
+        if isinstance(value, typing.List) and key not in ordered_keys:
+            return sorted(map(str, value))
+        return value
+
+    return {
+        key: value
+        for key, value in submitted.items()
+        if key not in loaded or normalize(key, loaded[key]) != normalize(key, value)
+    }
+
+
+async def edit_settings(
+    edit_method: str,
+    set_method: str,
+    params: typing.List[typing.Any],
+    modified: typing.Dict[str, typing.Any],
+    submitted: typing.Dict[str, typing.Any],
+) -> typing.Dict[str, typing.Any]:
+    # Only the modified settings are sent, with all of them as a fallback for the bots without the `EDIT_` methods.
+    requeststr = {
+        "jsonrpc": "2.0",
+        "id": 0,
+        "method": edit_method,
+        "params": [*params, modified],
+    }
+    result = await get_result(app, requeststr)
+    if result.get("method_not_found"):
+        requeststr = {
+            "jsonrpc": "2.0",
+            "id": 0,
+            "method": set_method,
+            "params": [*params, submitted],
+        }
+        result = await get_result(app, requeststr)
+    return result
+
+
+def wants_json() -> bool:
+    # Settings forms submitted with `$.submitForm` get their results in JSON, without a redirection and a reload.
+    return request.accept_mimetypes.best == "application/json"
+
+
+def make_settings_response(
+    form: FlaskForm,
+    notifications: typing.List[typing.Tuple[str, str]],
+    status: int = 0,
+    modified: typing.Iterable[str] = (),
+) -> Response:
+    if not wants_json():
+        for category, message in notifications:
+            flash(message, category=category)
+        return redirect(request.url)
+    return jsonify(
+        {
+            "status": status,
+            "modified": [form[key].name for key in modified if key in form],
+            "errors": {},
+            "notifications": [{"type": category, "message": message} for category, message in notifications],
+        }
+    )
+
+
+def make_form_errors_response(form: FlaskForm) -> typing.Optional[Response]:
+    if not wants_json():
+        for field_name, error_messages in form.errors.items():
+            flash(f"{field_name}: {' '.join(error_messages)}", category="warning")
+        return None
+    return make_response(
+        jsonify(
+            {
+                "status": 1,
+                "modified": [],
+                "errors": {field.name: list(field.errors) for field in form if field.errors},
+                "notifications": [{"type": "warning", "message": _("Failed to save the modifications.")}],
+            }
+        ),
+        400,
+    )
+
+
+class AliasForm(DashboardForm):
     alias_name: wtforms.StringField = wtforms.StringField(_("Name"), validators=[wtforms.validators.InputRequired(), wtforms.validators.Regexp(r"^[^\s]+$"), wtforms.validators.Length(max=300)])
     command: MarkdownTextAreaField = MarkdownTextAreaField(_("Command"), validators=[wtforms.validators.InputRequired(), wtforms.validators.Length(max=1700)])
 
 
-class AliasesForm(FlaskForm):
-    def __init__(self, aliases: typing.Dict[str, str]) -> None:
+class AliasesForm(DashboardForm):
+    def __init__(self, aliases: Pagination) -> None:
         super().__init__(prefix="aliases_form_")
-        for name, command in aliases.items():
+        self.pagination: Pagination = aliases
+        for name, command in aliases:
             self.aliases.append_entry({"alias_name": name, "command": command})
         self.aliases.default = [entry for entry in self.aliases.entries if entry.csrf_token.data is None]
         self.aliases.entries = [entry for entry in self.aliases.entries if entry.csrf_token.data is not None]
+        self.displayed.default = json.dumps([name for name, __ in aliases])
 
+    # Names of the aliases of the page, to know which ones have been deleted.
+    displayed: wtforms.HiddenField = wtforms.HiddenField()
     aliases: wtforms.FieldList = wtforms.FieldList(wtforms.FormField(AliasForm))
     submit: wtforms.SubmitField = wtforms.SubmitField(_("Save Modifications"))
 
 
-class CustomCommandResponseForm(FlaskForm):
+class CustomCommandResponseForm(DashboardForm):
     response: MarkdownTextAreaField = MarkdownTextAreaField(_("Response"), validators=[wtforms.validators.InputRequired(), wtforms.validators.Length(max=2000)])
 
 
-class CustomCommandForm(FlaskForm):
+class CustomCommandForm(DashboardForm):
     def __init__(self, *args, **kwargs) -> None:
         responses = kwargs.pop("responses", {})
         super().__init__(*args, **kwargs)
@@ -447,14 +703,17 @@ def __init__(self, *args, **kwargs) -> None:
     responses: wtforms.FieldList = wtforms.FieldList(wtforms.FormField(CustomCommandResponseForm), _("Responses"), min_entries=1)
 
 
-class CustomCommandsForm(FlaskForm):
-    def __init__(self, custom_commands: typing.Dict[str, typing.List[str]]) -> None:
+class CustomCommandsForm(DashboardForm):
+    def __init__(self, custom_commands: Pagination) -> None:
         super().__init__(prefix="custom_commands_form_")
-        for command, responses in custom_commands.items():
-            self.custom_commands.append_entry({"command": command, "responses": [responses] if isinstance(responses, str) else responses})
+        self.pagination: Pagination = custom_commands
+        for command, responses in custom_commands:
+            self.custom_commands.append_entry({"command": command, "responses": get_custom_command_responses(responses)})
         self.custom_commands.default = [entry for entry in self.custom_commands.entries if entry.csrf_token.data is None]
         self.custom_commands.entries = [entry for entry in self.custom_commands.entries if entry.csrf_token.data is not None]
+        self.displayed.default = json.dumps([command for command, __ in custom_commands])
 
+    displayed: wtforms.HiddenField = wtforms.HiddenField()
     custom_commands: wtforms.FieldList = wtforms.FieldList(wtforms.FormField(CustomCommandForm))
     submit: wtforms.SubmitField = wtforms.SubmitField(_("Save Modifications"))
 
@@ -484,28 +743,22 @@ async def dashboard_guild(
     }
     aliases = await get_result(app, requeststr)
     if aliases["status"] == 0:
-        aliases_form: AliasesForm = AliasesForm(aliases=aliases["aliases"])
+        aliases_form: AliasesForm = AliasesForm(aliases=get_entries_pagination(aliases["aliases"], "aliases"))
         if aliases_form.validate_on_submit():
-            requeststr = {
-                "jsonrpc": "2.0",
-                "id": 0,
-                "method": "DASHBOARDRPC_DEFAULTCOGS__SET_ALIASES",
-                "params": [
-                    current_user.id,
-                    guild_id,
-                    {
-                        alias["alias_name"]: alias["command"]
-                        for alias in aliases_form.aliases.data
-                    },
-                ],
-            }
-            result = await get_result(app, requeststr)
-            if result["status"] == 0:
-                flash(_("Successfully saved the modifications."), category="success")
-            else:
-                for error in result["errors"]:
-                    flash(error, category="warning")
-                flash(_("Failed to save the modifications."), category="danger")
+            changed, removed = get_entries_diff(
+                aliases["aliases"],
+                aliases_form.displayed.data,
+                {alias["alias_name"]: alias["command"] for alias in aliases_form.aliases.data},
+            )
+            result = await edit_entries(
+                guild_id,
+                "DASHBOARDRPC_DEFAULTCOGS__EDIT_ALIASES",
+                "DASHBOARDRPC_DEFAULTCOGS__SET_ALIASES",
+                aliases["aliases"],
+                changed,
+                removed,
+            )
+            flash_edit_result(result)
             return redirect(request.url)
         elif aliases_form.submit.data and aliases_form.errors:
             for field_name, error_messages in aliases_form.errors.items():
@@ -525,28 +778,28 @@ async def dashboard_guild(
     }
     custom_commands = await get_result(app, requeststr)
     if custom_commands["status"] == 0:
-        custom_commands_form: CustomCommandsForm = CustomCommandsForm(custom_commands=custom_commands["custom_commands"])
+        custom_commands_form: CustomCommandsForm = CustomCommandsForm(
+            custom_commands=get_entries_pagination(custom_commands["custom_commands"], "custom_commands")
+        )
         if custom_commands_form.validate_on_submit():
-            requeststr = {
-                "jsonrpc": "2.0",
-                "id": 0,
-                "method": "DASHBOARDRPC_DEFAULTCOGS__SET_CUSTOM_COMMANDS",
-                "params": [
-                    current_user.id,
-                    guild_id,
-                    {
-                        custom_command["command"]: (custom_command["responses"][0]["response"] if len(custom_command["responses"]) == 1 else [response["response"] for response in custom_command["responses"]])
-                        for custom_command in custom_commands_form.custom_commands.data
-                    },
-                ],
-            }
-            result = await get_result(app, requeststr)
-            if result["status"] == 0:
-                flash(_("Successfully saved the modifications."), category="success")
-            else:
-                for error in result["errors"]:
-                    flash(error, category="warning")
-                flash(_("Failed to save the modifications."), category="danger")
+            changed, removed = get_entries_diff(
+                custom_commands["custom_commands"],
+                custom_commands_form.displayed.data,
+                {
+                    custom_command["command"]: (custom_command["responses"][0]["response"] if len(custom_command["responses"]) == 1 else [response["response"] for response in custom_command["responses"]])
+                    for custom_command in custom_commands_form.custom_commands.data
+                },
+                normalize=get_custom_command_responses,
+            )
+            result = await edit_entries(
+                guild_id,
+                "DASHBOARDRPC_DEFAULTCOGS__EDIT_CUSTOM_COMMANDS",
+                "DASHBOARDRPC_DEFAULTCOGS__SET_CUSTOM_COMMANDS",
+                custom_commands["custom_commands"],
+                changed,
+                removed,
+            )
+            flash_edit_result(result)
             return redirect(request.url)
     else:
         custom_commands_form = None
@@ -556,49 +809,62 @@ async def dashboard_guild(
         guild_settings_form.validate_on_submit()
         and return_guild["guild"]["settings"]["edit_permission"]
     ):
-        requeststr = {
-            "jsonrpc": "2.0",
-            "id": 0,
-            "method": "DASHBOARDRPC__SET_GUILD_SETTINGS",
-            "params": [
-                current_user.id,
-                guild_id,
-                {
-                    "bot_nickname": guild_settings_form.bot_nickname.data.strip() or None,
-                    "prefixes": (prefixes if (prefixes := guild_settings_form.prefixes.data.split(";;|;;")) != [""] else []),
-                    "admin_roles": guild_settings_form.admin_roles.data,
-                    "mod_roles": guild_settings_form.mod_roles.data,
-                    "ignored": guild_settings_form.ignored.data,
-                    "disabled_commands": guild_settings_form.disabled_commands.data,
-                    "embeds": guild_settings_form.embeds.data,
-                    "use_bot_color": guild_settings_form.use_bot_color.data,
-                    "fuzzy": guild_settings_form.fuzzy.data,
-                    "delete_delay": guild_settings_form.delete_delay.data,
-                    "locale": guild_settings_form.locale.data,
-                    "regional_format": guild_settings_form.regional_format.data,
-                },
-            ],
+        settings = return_guild["guild"]["settings"]
+        submitted = {
+            "bot_nickname": guild_settings_form.bot_nickname.data.strip() or None,
+            "prefixes": (prefixes if (prefixes := guild_settings_form.prefixes.data.split(";;|;;")) != [""] else []),
+            "admin_roles": guild_settings_form.admin_roles.data,
+            "mod_roles": guild_settings_form.mod_roles.data,
+            "ignored": guild_settings_form.ignored.data,
+            "disabled_commands": guild_settings_form.disabled_commands.data,
+            "embeds": guild_settings_form.embeds.data,
+            "use_bot_color": guild_settings_form.use_bot_color.data,
+            "fuzzy": guild_settings_form.fuzzy.data,
+            "delete_delay": guild_settings_form.delete_delay.data,
+            "locale": guild_settings_form.locale.data,
+            "regional_format": guild_settings_form.regional_format.data,
         }
-        result = await get_result(app, requeststr)
+        modified = get_modified_settings(
+            {
+                **settings,
+                "admin_roles": [str(role["id"]) for role in settings["admin_roles"]],
+                "mod_roles": [str(role["id"]) for role in settings["mod_roles"]],
+            },
+            submitted,
+        )
+        if not modified:
+            return make_settings_response(guild_settings_form, [("info", _("No modifications to save."))])
+        result = await edit_settings(
+            "DASHBOARDRPC__EDIT_GUILD_SETTINGS",
+            "DASHBOARDRPC__SET_GUILD_SETTINGS",
+            [current_user.id, guild_id],
+            modified,
+            submitted,
+        )
         if result["status"] == 0:
+            notifications = []
             if result.get("change_nickname_error"):
-                flash(
-                    _(
-                        "Failed to change the bot's nickname. Make sure the bot has the required permissions."
-                    ),
-                    category="warning",
+                notifications.append(
+                    (
+                        "warning",
+                        _(
+                            "Failed to change the bot's nickname. Make sure the bot has the required permissions."
+                        ),
+                    )
                 )
-            flash(_("Successfully saved the modifications."), category="success")
-        else:
-            flash(_("Failed to save the modifications."), category="danger")
-        return redirect(request.url)
+            notifications.append(("success", _("Successfully saved the modifications.")))
+            return make_settings_response(guild_settings_form, notifications, modified=modified)
+        GUILD_ACCESS_CACHE.pop((current_user.id, guild_id))
+        return make_settings_response(
+            guild_settings_form, [("danger", _("Failed to save the modifications."))], status=1
+        )
     elif guild_settings_form.submit.data and guild_settings_form.errors:
-        for field_name, error_messages in guild_settings_form.errors.items():
-            flash(f"{field_name}: {' '.join(error_messages)}", category="warning")
+        if (response := make_form_errors_response(guild_settings_form)) is not None:
+            return response
 
     return_third_parties = await get_third_parties(guild_id=return_guild["guild"]["id"])
 
-    return render_template(
+    return render_template_stream(
         "pages/dashboard_guild.html",
         **return_guild,
         page=page
@@ -614,22 +880,32 @@ async def dashboard_guild(
     )
 
 
-async def get_third_parties(guild_id: typing.Optional[str] = None):
-    _third_parties = {
-        third_party: pages.copy() for third_party, pages in app.variables["third_parties"].items()
-    }
+THIRD_PARTIES_CACHE: LRUCache = LRUCache("third_parties", maxsize=16)
+
+
+def get_third_parties_view(is_owner: bool, for_guilds: bool) -> typing.Dict[str, typing.Any]:
+    # Filtered and sorted once per sync, with `GUILD_ID` as a placeholder in the guild pages URLs.
+    key = (
+        app.variables_versions.get("third_parties"),
+        app.variables_versions.get("commands"),
+        app.data_versions.get("disabled_third_parties"),
+        is_owner,
+        for_guilds,
+    )
+    if (view := THIRD_PARTIES_CACHE.get(key)) is not None:
+        return view
+    guild_id = "GUILD_ID" if for_guilds else None
     cogs_data = app.variables["commands"]
-    infos = {third_party: {} for third_party in _third_parties}
-    is_owner = current_user.is_authenticated and current_user.is_owner
+    infos = {third_party: {} for third_party in app.variables["third_parties"]}
     third_parties = {}
-    for third_party, pages in sorted(_third_parties.items()):
+    for third_party, pages in sorted(app.variables["third_parties"].items()):
         if third_party in app.data["disabled_third_parties"]:
             continue
         if not pages:
             continue
-        if all(page["hidden"] or (page["is_owner"] and not is_owner) or (guild_id is not None and "guild_id" not in page["context_ids"]) for page in pages.values()):
+        if all(page["hidden"] or (page["is_owner"] and not is_owner) or (for_guilds and "guild_id" not in page["context_ids"]) for page in pages.values()):
             continue
-        real_cog_name = third_party  # _third_parties[third_party][list(pages)[0]]["real_cog_name"]
+        real_cog_name = third_party  # pages[list(pages)[0]]["real_cog_name"]
         if real_cog_name in cogs_data:
             infos[third_party]["description"] = cogs_data[real_cog_name]["description"]
             infos[third_party]["author"] = cogs_data[real_cog_name]["author"]
@@ -639,36 +915,58 @@ async def get_third_parties(guild_id: typing.Optional[str] = None):
             infos[third_party]["author"] = "Unknown"
             infos[third_party]["repo"] = "Unknown"
         third_parties[third_party] = {}
-        if (
-            "null" in _third_parties[third_party]
-            and not _third_parties[third_party]["null"]["hidden"]
-            and not (_third_parties[third_party]["null"]["is_owner"] and not is_owner)
-            and (guild_id is None or "guild_id" in _third_parties[third_party]["null"]["context_ids"])
-        ):
-            third_parties[third_party]["Main Page"] = _third_parties[third_party].pop("null")
-            third_parties[third_party]["Main Page"]["url"] = url_for(
-                "third_parties_blueprint.third_party",
-                name=third_party,
-                page=None,
-                guild_id=guild_id,
-            )
-        for page in sorted(pages):
+        for page in ["null", *sorted(page for page in pages if page != "null")]:
             if (
-                not pages[page]["hidden"]
+                page in pages
+                and not pages[page]["hidden"]
                 and not (pages[page]["is_owner"] and not is_owner)
-                and (guild_id is None or "guild_id" in pages[page]["context_ids"])
+                and (not for_guilds or "guild_id" in pages[page]["context_ids"])
             ):
-                third_parties[third_party][page] = pages[page]
-                third_parties[third_party][page]["url"] = url_for(
-                    "third_parties_blueprint.third_party",
-                    name=third_party,
-                    page=page,
-                    guild_id=guild_id,
+                third_parties[third_party]["Main Page" if page == "null" else page] = dict(
+                    pages[page],
+                    url=url_for(
+                        "third_parties_blueprint.third_party",
+                        name=third_party,
+                        page=None if page == "null" else page,
+                        guild_id=guild_id,
+                    ),
                 )
-    return {"third_parties": third_parties, "third_parties_infos": infos}
+    view = {"third_parties": third_parties, "third_parties_infos": infos}
+    THIRD_PARTIES_CACHE.set(key, view)
+    return view
 
 
-class DashboardActionsForm(FlaskForm):
+def get_third_party_name(name: str) -> typing.Optional[str]:
+    # Case-insensitive lookup of a third party name.
+    key = ("names", app.variables_versions.get("third_parties"))
+    if (names := THIRD_PARTIES_CACHE.get(key)) is None:
+        names = {third_party.lower(): third_party for third_party in app.variables["third_parties"]}
+        THIRD_PARTIES_CACHE.set(key, names)
+    return names.get(name.lower())
+
+
+async def get_third_parties(guild_id: typing.Optional[str] = None):
+    view = get_third_parties_view(
+        is_owner=current_user.is_authenticated and current_user.is_owner,
+        for_guilds=guild_id is not None,
+    )
+    if guild_id is None:
+        return view
+    # Only the guild segment is replaced, the first of the path: a name or a page could contain the placeholder too.
+    third_parties = {
+        third_party: {
+            page: dict(
+                page_data,
+                url="{0}/{guild_id}/{2}".format(*page_data["url"].partition("/GUILD_ID/"), guild_id=guild_id),
+            )
+            for page, page_data in pages.items()
+        }
+        for third_party, pages in view["third_parties"].items()
+    }
+    return {"third_parties": third_parties, "third_parties_infos": view["third_parties_infos"]}
+
+
+class DashboardActionsForm(DashboardForm):
     def __init__(self) -> None:
         super().__init__(prefix="dashboard_actions_form_")
 
@@ -676,7 +974,7 @@ def __init__(self) -> None:
     refresh_sessions: wtforms.SubmitField = wtforms.SubmitField(_("Refresh Sessions"))
 
 
-class DiscordProfileForm(FlaskForm):
+class DiscordProfileForm(DashboardForm):
     def __init__(self) -> None:
         super().__init__(prefix="bot_profile_form_")
         self.username.default = app.variables["bot"]["name"]
@@ -693,7 +991,7 @@ def __init__(self) -> None:
     submit: wtforms.SubmitField = wtforms.SubmitField(_("Save Modifications"))
 
 
-class DashboardSettingsForm(FlaskForm):
+class DashboardSettingsForm(DashboardForm):
     def __init__(self, settings: typing.Dict[str, typing.Any]) -> None:
         super().__init__(prefix="dashboard_settings_form_")
         self.title.default = settings["title"]
@@ -735,31 +1033,12 @@ def __init__(self, settings: typing.Dict[str, typing.Any]) -> None:
     submit: wtforms.SubmitField = wtforms.SubmitField(_("Save Modifications"))
 
 
-class BotSettingsForm(FlaskForm):
+class BotSettingsForm(DashboardForm):
     def __init__(self, settings: typing.Dict[str, typing.Any]) -> None:
         super().__init__(prefix="bot_settings_form_")
         self.prefixes.default = ";;|;;".join(settings["prefixes"])
         self.invoke_error_msg.default = settings["invoke_error_msg"]
-        available_commands = []
-        all_commands = deepcopy(app.variables["commands"])
-        for cog_data in all_commands.values():
-            for command in cog_data["commands"]:
-                if command["privilege_level"] == "BOT_OWNER" or command["name"] == "command":
-                    continue
-                available_commands.append((command["name"], command["name"]))
-
-                def check_subs(subs):
-                    _subs = []
-                    for sub in subs:
-                        if sub["privilege_level"] == "BOT_OWNER":
-                            continue
-                        available_commands.append((sub["name"], sub["name"]))
-                        if sub["subs"]:
-                            check_subs(sub["subs"])
-                    return _subs
-
-                check_subs(command["subs"])
-        self.disabled_commands.choices = sorted(available_commands)
+        self.disabled_commands.choices = get_commands_choices()
         self.disabled_commands.default = settings["disabled_commands"].copy()
         self.disabled_command_msg.default = settings["disabled_command_msg"]
         self.description.default = settings["description"]
@@ -813,12 +1092,12 @@ def check_subs(subs):
     submit: wtforms.SubmitField = wtforms.SubmitField(_("Save Modifications"))
 
 
-class CustomPageForm(FlaskForm):
+class CustomPageForm(DashboardForm):
     title: wtforms.StringField = wtforms.StringField(_("Title"), validators=[wtforms.validators.InputRequired(), wtforms.validators.Length(max=20)])
     content: MarkdownTextAreaField = MarkdownTextAreaField(_("Content"), validators=[wtforms.validators.InputRequired(), wtforms.validators.Length(max=5000)])
 
 
-class CustomPagesForm(FlaskForm):
+class CustomPagesForm(DashboardForm):
     def __init__(self, custom_pages: typing.Dict[str, str]) -> None:
         super().__init__(prefix="custom_pages_form_")
         for title, content in custom_pages.items():
@@ -905,7 +1184,7 @@ async def admin(
         settings=dashboard_settings
     )
     if dashboard_settings_form.validate_on_submit():
-        new_dashboard_settings = {
+        submitted = {
             "title": dashboard_settings_form.title.data.strip() or None,
             "icon": dashboard_settings_form.icon.data.strip() or None,
             "website_description": dashboard_settings_form.website_description.data.strip() or None,
@@ -916,28 +1195,40 @@ async def admin(
             "default_sidenav_theme": dashboard_settings_form.default_sidenav_theme.data,
             "disabled_third_parties": dashboard_settings_form.disabled_third_parties.data,
         }
-        requeststr = {
-            "jsonrpc": "2.0",
-            "id": 0,
-            "method": "DASHBOARDRPC__SET_DASHBOARD_SETTINGS",
-            "params": [
-                current_user.id,
-                new_dashboard_settings,
-            ],
-        }
-        result = await get_result(app, requeststr)
+        modified = get_modified_settings(dashboard_settings, submitted)
+        if not modified:
+            return make_settings_response(dashboard_settings_form, [("info", _("No modifications to save."))])
+        result = await edit_settings(
+            "DASHBOARDRPC__EDIT_DASHBOARD_SETTINGS",
+            "DASHBOARDRPC__SET_DASHBOARD_SETTINGS",
+            [current_user.id],
+            modified,
+            submitted,
+        )
         if result["status"] == 0:
-            app.data["disabled_third_parties"] = new_dashboard_settings.pop(
-                "disabled_third_parties"
+            new_dashboard_settings = modified.copy()
+            if "disabled_third_parties" in new_dashboard_settings:
+                app.data["disabled_third_parties"] = new_dashboard_settings.pop(
+                    "disabled_third_parties"
+                )
+                app.data_versions["disabled_third_parties"] = (
+                    app.data_versions.get("disabled_third_parties", 0) + 1
+                )
+            if new_dashboard_settings:
+                app.data["ui"]["meta"].update(**new_dashboard_settings)
+                # Updated in place, so the next sync doesn't see the change.
+                app.data_versions["ui"] = app.data_versions.get("ui", 0) + 1
+            return make_settings_response(
+                dashboard_settings_form,
+                [("success", _("Successfully saved the modifications."))],
+                modified=modified,
             )
-            app.data["ui"]["meta"].update(**new_dashboard_settings)
-            flash(_("Successfully saved the modifications."), category="success")
-        else:
-            flash(_("Failed to save the modifications."), category="danger")
-        return redirect(request.url)
+        return make_settings_response(
+            dashboard_settings_form, [("danger", _("Failed to save the modifications."))], status=1
+        )
     elif dashboard_settings_form.submit.data and dashboard_settings_form.errors:
-        for field_name, error_messages in dashboard_settings_form.errors.items():
-            flash(f"{field_name}: {' '.join(error_messages)}", category="warning")
+        if (response := make_form_errors_response(dashboard_settings_form)) is not None:
+            return response
 
     requeststr = {
         "jsonrpc": "2.0",
@@ -949,41 +1240,46 @@ async def admin(
         bot_settings = await get_result(app, requeststr)
     bot_settings_form: BotSettingsForm = BotSettingsForm(settings=bot_settings)
     if bot_settings_form.validate_on_submit():
-        requeststr = {
-            "jsonrpc": "2.0",
-            "id": 0,
-            "method": "DASHBOARDRPC__SET_BOT_SETTINGS",
-            "params": [
-                current_user.id,
-                {
-                    "prefixes": (prefixes if (prefixes := bot_settings_form.prefixes.data.split(";;|;;")) != [""] else []),
-                    "invoke_error_msg": bot_settings_form.invoke_error_msg.data.strip() or None,
-                    "disabled_commands": bot_settings_form.disabled_commands.data,
-                    "disabled_command_msg": bot_settings_form.disabled_command_msg.data.strip()
-                    or None,
-                    "description": bot_settings_form.description.data.strip() or None,
-                    "custom_info": bot_settings_form.custom_info.data.strip() or None,
-                    "embeds": bot_settings_form.embeds.data,
-                    "color": bot_settings_form.color.data.strip() or None,
-                    "fuzzy": bot_settings_form.fuzzy.data,
-                    "use_buttons": bot_settings_form.use_buttons.data,
-                    "invite_public": bot_settings_form.invite_public.data,
-                    "invite_commands_scope": bot_settings_form.invite_commands_scope.data,
-                    "invite_perms": bot_settings_form.invite_perms.data,
-                    "locale": bot_settings_form.locale.data,
-                    "regional_format": bot_settings_form.regional_format.data,
-                },
-            ],
+        submitted = {
+            "prefixes": (prefixes if (prefixes := bot_settings_form.prefixes.data.split(";;|;;")) != [""] else []),
+            "invoke_error_msg": bot_settings_form.invoke_error_msg.data.strip() or None,
+            "disabled_commands": bot_settings_form.disabled_commands.data,
+            "disabled_command_msg": bot_settings_form.disabled_command_msg.data.strip()
+            or None,
+            "description": bot_settings_form.description.data.strip() or None,
+            "custom_info": bot_settings_form.custom_info.data.strip() or None,
+            "embeds": bot_settings_form.embeds.data,
+            "color": bot_settings_form.color.data.strip() or None,
+            "fuzzy": bot_settings_form.fuzzy.data,
+            "use_buttons": bot_settings_form.use_buttons.data,
+            "invite_public": bot_settings_form.invite_public.data,
+            "invite_commands_scope": bot_settings_form.invite_commands_scope.data,
+            "invite_perms": bot_settings_form.invite_perms.data,
+            "locale": bot_settings_form.locale.data,
+            "regional_format": bot_settings_form.regional_format.data,
         }
-        result = await get_result(app, requeststr)
+        modified = get_modified_settings(bot_settings, submitted)
+        if not modified:
+            return make_settings_response(bot_settings_form, [("info", _("No modifications to save."))])
+        result = await edit_settings(
+            "DASHBOARDRPC__EDIT_BOT_SETTINGS",
+            "DASHBOARDRPC__SET_BOT_SETTINGS",
+            [current_user.id],
+            modified,
+            submitted,
+        )
         if result["status"] == 0:
-            flash(_("Successfully saved the modifications."), category="success")
-        else:
-            flash(_("Failed to save the modifications."), category="danger")
-        return redirect(request.url)
+            return make_settings_response(
+                bot_settings_form,
+                [("success", _("Successfully saved the modifications."))],
+                modified=modified,
+            )
+        return make_settings_response(
+            bot_settings_form, [("danger", _("Failed to save the modifications."))], status=1
+        )
     elif bot_settings_form.submit.data and bot_settings_form.errors:
-        for field_name, error_messages in bot_settings_form.errors.items():
-            flash(f"{field_name}: {' '.join(error_messages)}", category="warning")
+        if (response := make_form_errors_response(bot_settings_form)) is not None:
+            return response
 
     custom_pages = {page["title"]: page["content"] for page in app.data["custom_pages"]}
     custom_pages_form: CustomPagesForm = CustomPagesForm(custom_pages=custom_pages)
@@ -996,6 +1292,8 @@ async def admin(
             }
             for custom_page in custom_pages_form.custom_pages.data
         ]
+        if custom_pages == app.data["custom_pages"]:
+            return make_settings_response(custom_pages_form, [("info", _("No modifications to save."))])
         requeststr = {
             "jsonrpc": "2.0",
             "id": 0,
@@ -1008,15 +1306,21 @@ async def admin(
         result = await get_result(app, requeststr)
         if result["status"] == 0:
             app.data["custom_pages"] = custom_pages
-            flash(_("Successfully saved the modifications."), category="success")
-        else:
-            flash(_("Failed to save the modifications."), category="danger")
-        return redirect(request.url)
+            app.data_versions["custom_pages"] = app.data_versions.get("custom_pages", 0) + 1
+            index_custom_pages(app)
+            return make_settings_response(
+                custom_pages_form,
+                [("success", _("Successfully saved the modifications."))],
+                modified=["custom_pages"],
+            )
+        return make_settings_response(
+            custom_pages_form, [("danger", _("Failed to save the modifications."))], status=1
+        )
     elif custom_pages_form.submit.data and custom_pages_form.errors:
-        for field_name, error_messages in custom_pages_form.errors.items():
-            flash(f"{field_name}: {' '.join(error_messages)}", category="warning")
+        if (response := make_form_errors_response(custom_pages_form)) is not None:
+            return response
 
-    return render_template(
+    return render_template_stream(
         "pages/admin.html",
         page=page
         if page is not None and page in ("overview", "dashboard-settings", "bot-settings", "custom-pages")
@@ -1030,9 +1334,67 @@ async def admin(
         custom_pages_form=custom_pages_form,
     )
 
+
+@blueprint.route("/admin/profiles/<int:profile_id>")
+@blueprint.route("/admin/profiles")
+@login_required
+async def profiles(profile_id: typing.Optional[int] = None):
+    if not current_user.is_authenticated or not current_user.is_owner:
+        return abort(403, description=_("You're not a bot owner!"))
+    if profile_id is None:
+        profile = None
+    elif (profile := app.profiler.get(profile_id)) is None:
+        return abort(404, description=_("This profile doesn't exist anymore."))
+    else:
+        if (profile_format := request.args.get("format")) in ("pstats", "collapsed"):
+            response = make_response(
+                app.profiler.to_pstats(profile)
+                if profile_format == "pstats"
+                else app.profiler.to_collapsed(profile)
+            )
+            response.mimetype = "application/octet-stream" if profile_format == "pstats" else "text/plain"
+            response.headers["Content-Disposition"] = f"attachment; filename=profile-{profile_id}.{profile_format}"
+            return response
+    return render_template(
+        "pages/profiles.html",
+        profiles=list(app.profiler.profiles),
+        profile=profile,
+        profile_text=app.profiler.to_text(profile) if profile is not None else None,
+    )
+
+
 @blueprint.route("/custom-page/<page_url>")
 async def custom_page(page_url: str):
-    page = next((p for p in app.data["custom_pages"] if p["url"] == page_url), None)
+    page = app.custom_pages.get(page_url)
     if page is None:
         return abort(404, description=_("Page not found."))
-    return render_template("pages/custom_page.html", page=page)
+    # The page content is prerendered, but the layout around it depends on the visitor.
+    # It also embeds a CSRF token: a cached page mustn't outlive its token (new process, new session or expiration).
+    # All the synced data and all the cookies are included, so a new input of the layout can't be forgotten here.
+    csrf_time_limit = app.config.get("WTF_CSRF_TIME_LIMIT", 3600)
+    session_cookie_name = app.config["SESSION_COOKIE_NAME"]
+    etag = hashlib.sha1(
+        repr(
+            (
+                page["etag"],
+                app.boot_id,
+                session.get("csrf_token"),
+                int(time.time() // (csrf_time_limit / 2)) if csrf_time_limit else None,
+                sorted(app.data_versions.items()),
+                # The stats change at each sync, but aren't displayed by the layout.
+                sorted((key, version) for key, version in app.variables_versions.items() if key != "stats"),
+                app.locked,
+                current_user.id if current_user.is_authenticated else None,
+                app.extensions["babel"].locale_selector(),
+                sorted((name, value) for name, value in request.cookies.items() if name != session_cookie_name),
+            )
+        ).encode()
+    ).hexdigest()
+    if etag in request.if_none_match and not session.get("_flashes"):
+        response = make_response("", 304)
+    else:
+        response = make_response(render_template("pages/custom_page.html", page=page))
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    response.cache_control.private = True
+    return response
@@ -0,0 +1,80 @@
+import typing  # isort:skip
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe bounded cache, evicting the least recently used entries first. Entries can expire after a TTL."""
+
+    CACHES: typing.Dict[str, "LRUCache"] = {}
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: typing.Optional[float] = None) -> None:
+        self.name: str = name
+        self.maxsize: int = maxsize
+        self.ttl: typing.Optional[float] = ttl
+        self.hits: int = 0
+        self.misses: int = 0
+
+        self._data: typing.OrderedDict[typing.Hashable, typing.Any] = OrderedDict()
+        self._expirations: typing.Dict[typing.Hashable, float] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+        self.__class__.CACHES[self.name] = self
+
+    def __repr__(self) -> str:
+        return f"<LRUCache name={self.name!r} size={len(self)} maxsize={self.maxsize} hits={self.hits} misses={self.misses}>"
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: typing.Hashable) -> bool:
+        with self._lock:
+            return key in self._data and not self._expire(key)
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _expire(self, key: typing.Hashable) -> bool:
+        expiration = self._expirations.get(key)
+        if expiration is None or expiration > time.monotonic():
+            return False
+        del self._data[key]
+        del self._expirations[key]
+        return True
+
+    def get(self, key: typing.Hashable, default: typing.Any = None) -> typing.Any:
+        with self._lock:
+            if key not in self._data or self._expire(key):
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def set(
+        self, key: typing.Hashable, value: typing.Any, ttl: typing.Optional[float] = None
+    ) -> None:
+        ttl = ttl if ttl is not None else self.ttl
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if ttl is not None:
+                self._expirations[key] = time.monotonic() + ttl
+            else:
+                self._expirations.pop(key, None)
+            while len(self._data) > self.maxsize:
+                self._expirations.pop(self._data.popitem(last=False)[0], None)
+
+    def pop(self, key: typing.Hashable, default: typing.Any = None) -> typing.Any:
+        with self._lock:
+            self._expirations.pop(key, None)
+            return self._data.pop(key, default)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._expirations.clear()
@@ -0,0 +1,72 @@
+import typing  # isort:skip
+
+import json
+import queue
+import threading
+import time
+
+
+class EventsBroadcaster:
+    """Fan out the events published by the `TasksManager` sync to the Server-Sent Events subscribers.
+
+    Each subscriber has its own bounded queue: a client too slow to consume its events loses them,
+    instead of slowing down the sync.
+    """
+
+    def __init__(self, max_subscribers: int = 4, queue_size: int = 100) -> None:
+        self.max_subscribers: int = max_subscribers
+        self.queue_size: int = queue_size
+        self.published: int = 0
+        self.dropped: int = 0
+
+        self._subscribers: typing.List[queue.Queue] = []
+        self._lock: threading.Lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: str, data: typing.Any) -> None:
+        message = f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        with self._lock:
+            self.published += 1
+            for subscriber in self._subscribers:
+                try:
+                    subscriber.put_nowait(message)
+                except queue.Full:
+                    self.dropped += 1
+
+    def subscribe(self) -> typing.Optional[queue.Queue]:
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscriber = queue.Queue(maxsize=self.queue_size)
+            self._subscribers.append(subscriber)
+            return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        with self._lock:
+            try:
+                self._subscribers.remove(subscriber)
+            except ValueError:
+                pass
+
+    def stream(
+        self,
+        subscriber: queue.Queue,
+        initial_events: typing.Dict[str, typing.Any],
+        max_duration: float,
+        keepalive_interval: float = 15,
+    ) -> typing.Iterator[str]:
+        # Clients are disconnected after `max_duration`, so a worker thread is never held forever. `EventSource` reconnects by itself.
+        try:
+            yield "retry: 5000\n\n"
+            for event, data in initial_events.items():
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+            end = time.monotonic() + max_duration
+            while (remaining := end - time.monotonic()) > 0:
+                try:
+                    yield subscriber.get(timeout=min(keepalive_interval, remaining))
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+        finally:
+            self.unsubscribe(subscriber)
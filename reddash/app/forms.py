@@ -0,0 +1,93 @@
+import typing  # isort:skip
+
+import functools
+
+import bleach
+from flask_wtf import FlaskForm
+from flask_wtf.file import FileAllowed, FileField, MultipleFileField
+from wtforms import Field, FieldList, FormField, SelectFieldBase
+from wtforms.fields.core import UnboundField
+
+from .metrics import timed
+
+
+@functools.lru_cache(maxsize=4096)
+def escape_choice(text: str) -> str:
+    # Returns a `str` and not a `Markup`: the widgets escape the choices a second time, as expected by Choices.js with `allowHTML`.
+    # `bleach` leaves the existing entities alone (a `&amp;` in a role name isn't displayed as `&amp;amp;`), and
+    # normalizes the control characters: it is only skipped for the usual names, which it returns as they are.
+    if text.isprintable() and not any(character in text for character in "&<>"):
+        return text
+    return bleach.clean(text, tags=[], strip=False)
+
+
+class DashboardFieldMixin:
+    def _value(self) -> typing.Union[str, typing.List]:
+        # Fields display their `default` when they have no data, as the defaults are set after the form initialization.
+        value = real_value() if (real_value := getattr(super(), "_value", None)) is not None else ""
+        if value or self.default is None:
+            return value or ""
+        return self.default if isinstance(self.default, typing.List) else str(self.default)
+
+
+class DashboardSelectFieldMixin(DashboardFieldMixin):
+    def _choices_generator(self, choices: typing.Iterable) -> typing.Iterator[typing.Tuple]:
+        current_value = self._value()
+        if isinstance(current_value, typing.List):
+            current_value = set(current_value)
+            is_selected = lambda value: self.coerce(value) in current_value  # NOQA
+        else:
+            is_selected = lambda value: self.coerce(value) == current_value  # NOQA
+        sanitized = getattr(self, "choices_sanitized", False)
+        for value, label, selected, render_kw in super()._choices_generator(choices):
+            selected = selected or is_selected(value)
+            if not sanitized:
+                value = escape_choice(value) if value is not None else None
+                label = escape_choice(label)
+            yield value, label, selected, render_kw
+
+
+class DashboardFileFieldMixin(DashboardFieldMixin):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        if (
+            file_allowed := next(
+                (validator for validator in self.validators if isinstance(validator, FileAllowed)),
+                None,
+            )
+        ) is not None:
+            self.flags.accept = ", ".join([f".{extension}" for extension in file_allowed.upload_set])
+
+
+@functools.lru_cache(maxsize=None)
+def get_dashboard_field_class(field_class: typing.Type[Field]) -> typing.Type[Field]:
+    if issubclass(field_class, (DashboardFieldMixin, FormField)):
+        return field_class
+    if issubclass(field_class, SelectFieldBase):
+        mixin = DashboardSelectFieldMixin
+    elif issubclass(field_class, (FileField, MultipleFileField)):
+        mixin = DashboardFileFieldMixin
+    else:
+        mixin = DashboardFieldMixin
+    # Same name, as the templates use `field.type`.
+    return type(field_class.__name__, (mixin, field_class), {"__module__": field_class.__module__})
+
+
+class DashboardForm(FlaskForm):
+    """Base of the dashboard forms, whose fields display their defaults and escape their choices.
+
+    The fields classes are replaced once, when each form class is created.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        with timed("forms"):
+            super().__init__(*args, **kwargs)
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        for value in vars(cls).values():
+            if not isinstance(value, UnboundField):
+                continue
+            value.field_class = get_dashboard_field_class(value.field_class)
+            if issubclass(value.field_class, FieldList) and isinstance(value.args[0], UnboundField):
+                value.args[0].field_class = get_dashboard_field_class(value.args[0].field_class)
@@ -0,0 +1,238 @@
+import typing  # isort:skip
+
+import contextlib
+import os
+import threading
+import time
+
+from flask import (
+    Flask,
+    Response,
+    before_render_template,
+    g,
+    has_request_context,
+    request,
+    template_rendered,
+)
+from flask_login import current_user
+
+try:
+    import resource
+except ImportError:  # Windows.
+    resource = None
+
+from .cache import LRUCache
+
+BUCKETS: typing.Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Histogram:
+    def __init__(self, buckets: typing.Tuple[float, ...] = BUCKETS) -> None:
+        self.buckets: typing.Tuple[float, ...] = buckets
+        self.counts: typing.List[int] = [0] * len(buckets)
+        self.count: int = 0
+        self.sum: float = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bucket in enumerate(self.buckets):
+            if value <= bucket:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def render(self, name: str, labels: str) -> typing.List[str]:
+        lines = []
+        cumulative = 0
+        for bucket, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bucket}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+def escape_label(value: typing.Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def record_timing(phase: str, duration: float) -> None:
+    # Phases of the current request, for the `Server-Timing` header and the slow requests log.
+    if not has_request_context():
+        return
+    if "timings" not in g:
+        g.timings = {}
+    total, count = g.timings.get(phase, (0.0, 0))
+    g.timings[phase] = (total + duration, count + 1)
+
+
+@contextlib.contextmanager
+def timed(phase: str) -> typing.Iterator[None]:
+    # Nested calls of the same phase (a template rendered in a template...) are only counted once.
+    depths = g.setdefault("timings_depths", {}) if has_request_context() else {}
+    depths[phase] = depths.get(phase, 0) + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        depths[phase] -= 1
+        if not depths[phase]:
+            record_timing(phase, time.perf_counter() - start)
+
+
+class Metrics:
+    """Runtime metrics of the webserver, exported in the Prometheus text format."""
+
+    def __init__(self) -> None:
+        self.app: typing.Optional[Flask] = None
+        self.requests: typing.Dict[typing.Tuple[str, str, int], int] = {}
+        self.requests_durations: typing.Dict[typing.Tuple[str, int], Histogram] = {}
+        self.rpc_durations: typing.Dict[str, Histogram] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def init_app(self, app: Flask) -> None:
+        self.app = app
+
+        @app.before_request
+        def start_request_timer() -> None:
+            g.request_start = time.perf_counter()
+
+        @app.after_request
+        def observe_request(response: Response) -> Response:
+            if "request_start" in g:
+                duration = time.perf_counter() - g.request_start
+                # Labelled by endpoint and not by path, to keep a bounded number of series.
+                self.observe_request(
+                    request.endpoint or "none", request.method, response.status_code, duration
+                )
+                self.add_server_timing(response, duration)
+            return response
+
+        def start_render(sender: Flask, template: typing.Any, context: typing.Dict) -> None:
+            if not g.get("timings_depths", {}).get("render"):
+                g.render_start = time.perf_counter()
+            g.setdefault("timings_depths", {})["render"] = g.timings_depths.get("render", 0) + 1
+
+        def stop_render(sender: Flask, template: typing.Any, context: typing.Dict) -> None:
+            g.timings_depths["render"] -= 1
+            if not g.timings_depths["render"]:
+                record_timing("render", time.perf_counter() - g.render_start)
+
+        before_render_template.connect(start_render, app, weak=False)
+        template_rendered.connect(stop_render, app, weak=False)
+
+    def add_server_timing(self, response: Response, duration: float) -> None:
+        # Streamed templates are mostly rendered after this, so only their start is measured.
+        timings = g.get("timings", {})
+        if duration >= self.app.config["SLOW_REQUEST_THRESHOLD"]:
+            self.app.logger.warning(
+                f"Slow request: {request.method} {request.path} took {duration * 1000:.0f}ms ("
+                + ", ".join(f"{phase}: {total * 1000:.0f}ms" for phase, (total, __) in timings.items())
+                + ")."
+            )
+        if not self.app.config["SERVER_TIMING"] and not (
+            current_user.is_authenticated and current_user.is_owner
+        ):
+            return
+        response.headers["Server-Timing"] = ", ".join(
+            [
+                f'{phase};dur={total * 1000:.1f};desc="{count} call{"s" if count > 1 else ""}"'
+                for phase, (total, count) in timings.items()
+            ]
+            + [f"total;dur={duration * 1000:.1f}"]
+        )
+
+    def observe_request(self, endpoint: str, method: str, status: int, duration: float) -> None:
+        with self._lock:
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            # By status too, so the fast errors (redirections to the login, 404...) don't hide the slow pages.
+            self.requests_durations.setdefault((endpoint, status), Histogram()).observe(duration)
+
+    def observe_rpc(self, method: str, duration: float) -> None:
+        with self._lock:
+            self.rpc_durations.setdefault(method, Histogram()).observe(duration)
+
+    def render(self) -> str:
+        app = self.app
+        lines = []
+
+        def add(name: str, kind: str, description: str, samples: typing.Iterable[typing.Tuple[str, typing.Any]]) -> None:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+
+        with self._lock:
+            add(
+                "reddash_requests_total",
+                "counter",
+                "Requests handled, by endpoint, method and status code.",
+                (
+                    (f'endpoint="{escape_label(endpoint)}",method="{method}",status="{status}"', count)
+                    for (endpoint, method, status), count in sorted(self.requests.items())
+                ),
+            )
+            lines.append("# HELP reddash_request_duration_seconds Requests duration, by endpoint and status code.")
+            lines.append("# TYPE reddash_request_duration_seconds histogram")
+            for (endpoint, status), histogram in sorted(self.requests_durations.items()):
+                lines.extend(
+                    histogram.render(
+                        "reddash_request_duration_seconds", f'endpoint="{escape_label(endpoint)}",status="{status}"'
+                    )
+                )
+            lines.append("# HELP reddash_rpc_duration_seconds RPC calls duration, by method.")
+            lines.append("# TYPE reddash_rpc_duration_seconds histogram")
+            for method, histogram in sorted(self.rpc_durations.items()):
+                lines.extend(histogram.render("reddash_rpc_duration_seconds", f'method="{escape_label(method)}"'))
+
+        add("reddash_rpc_connected", "gauge", "Whether the RPC websocket is connected.", [("", int(app.config["RPC_CONNECTED"]))])
+        add(
+            "reddash_last_rpc_event_age_seconds",
+            "gauge",
+            "Time since the last RPC connection or disconnection.",
+            [("", (time.time() - app.config["LAST_RPC_EVENT"].timestamp()))],
+        )
+        now = time.monotonic()
+        add(
+            "reddash_task_heartbeat_age_seconds",
+            "gauge",
+            "Time since the last iteration of each background task.",
+            ((f'task="{escape_label(task)}"', now - heartbeat) for task, heartbeat in sorted(app.tasks_manager.heartbeats.items())),
+        )
+        add(
+            "reddash_task_up",
+            "gauge",
+            "Whether each background task is still running.",
+            ((f'task="{escape_label(task)}"', int(task not in app.tasks_manager.dead_tasks)) for task in sorted(app.tasks_manager.heartbeats)),
+        )
+        caches = sorted(LRUCache.CACHES.items())
+        add("reddash_cache_hits_total", "counter", "Cache hits.", ((f'cache="{name}"', cache.hits) for name, cache in caches))
+        add("reddash_cache_misses_total", "counter", "Cache misses.", ((f'cache="{name}"', cache.misses) for name, cache in caches))
+        add("reddash_cache_hit_ratio", "gauge", "Cache hit ratio.", ((f'cache="{name}"', cache.hit_ratio) for name, cache in caches))
+        add("reddash_cache_size", "gauge", "Cache entries.", ((f'cache="{name}"', len(cache)) for name, cache in caches))
+        if (dispatcher := getattr(getattr(app, "server", None), "task_dispatcher", None)) is not None:
+            add("reddash_waitress_queue_depth", "gauge", "Requests waiting for a waitress thread.", [("", len(dispatcher.queue))])
+            add("reddash_waitress_active_threads", "gauge", "Waitress threads handling a request.", [("", dispatcher.active_count)])
+        if app.webhooks_queue is not None:
+            add("reddash_webhooks_queue_depth", "gauge", "Webhooks waiting to be forwarded to the bot.", [("", len(app.webhooks_queue))])
+        add("reddash_stream_subscribers", "gauge", "Clients connected to the events stream.", [("", len(app.events_broadcaster))])
+        if resource is not None:
+            # `ru_maxrss` is in kilobytes on Linux.
+            add(
+                "reddash_process_max_resident_memory_bytes",
+                "gauge",
+                "Peak resident memory of the process.",
+                [("", resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)],
+            )
+        if os.path.exists("/proc/self/statm"):
+            with open("/proc/self/statm") as f:
+                rss_pages = int(f.read().split()[1])
+            add(
+                "reddash_process_resident_memory_bytes",
+                "gauge",
+                "Resident memory of the process.",
+                [("", rss_pages * os.sysconf("SC_PAGE_SIZE"))],
+            )
+        return "\n".join(lines) + "\n"
@@ -1,9 +1,59 @@
 import typing  # isort:skip
 
+import base64
+import binascii
+import bisect
+import functools
+import json
+
+from flask import current_app, render_template
+from jinja2 import Template
 from markupsafe import Markup
 
 
-class Pagination(typing.List):
+def list_to_tuple(value: typing.Any) -> typing.Any:
+    if isinstance(value, typing.List):
+        return tuple(list_to_tuple(element) for element in value)
+    return value
+
+
+class KeysSequence(typing.Sequence):
+    """Lazy view of the keys of sorted items, for `bisect`."""
+
+    def __init__(self, items: typing.Sequence[typing.Any], key: typing.Callable[[typing.Any], typing.Any]) -> None:
+        self.items: typing.Sequence[typing.Any] = items
+        self.key: typing.Callable[[typing.Any], typing.Any] = key
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __getitem__(self, index: int) -> typing.Any:
+        return self.key(self.items[index])
+
+
+class BasePagination(typing.List):
+    """Base of the pagination systems, rendering their widget from `HTML`."""
+
+    HTML: str = ""
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def get_html(cls, KEY: str, custom_kwargs: bool = False) -> str:
+        return cls.HTML.replace("KEY", KEY).replace("CUSTOM_KWARG", f"{KEY}_" if custom_kwargs else "")
+
+    @classmethod
+    @functools.lru_cache(maxsize=64)
+    def get_template(cls, KEY: str, custom_kwargs: bool = False) -> Template:
+        # The widget is compiled once per variant, instead of for each paginated list of each request.
+        return current_app.jinja_env.from_string(cls.get_html(KEY, custom_kwargs))
+
+    def to_html(self, KEY: str = "pagination", custom_kwargs: bool = False, render_template_string: bool = True) -> Markup:
+        if not render_template_string:
+            return self.get_html(KEY, custom_kwargs)
+        return Markup(render_template(self.get_template(KEY, custom_kwargs), **{KEY: self}))
+
+
+class Pagination(BasePagination):
     """Pagination system for lists."""
 
     DEFAULT_PER_PAGE: int = 20
@@ -39,17 +89,34 @@ def has_next(self) -> bool:
         return self.page < self.pages
 
     @property
-    def elements_numbers(self) -> typing.List[int]:
-        return list(range(1, self.total + 1))
+    def elements_numbers(self) -> range:
+        return range(1, self.total + 1)
 
     @property
-    def pages_numbers(self) -> typing.List[int]:
-        return list(range(1, self.pages + 1))
+    def pages_numbers(self) -> range:
+        return range(1, self.pages + 1)
+
+    @staticmethod
+    def _paginate_iterable(
+        items: typing.Iterable[typing.Any], per_page: int, page: int
+    ) -> typing.Tuple[typing.List[typing.Any], int]:
+        # The total is only known at the end, so the last page is kept in case the requested page doesn't exist.
+        start, end = (page - 1) * per_page, page * per_page
+        current, last = [], []
+        total = 0
+        for index, item in enumerate(items):
+            if index % per_page == 0:
+                last = []
+            last.append(item)
+            if start <= index < end:
+                current.append(item)
+            total = index + 1
+        return current or last, total
 
     @classmethod
     def from_list(
         cls,
-        items: typing.List[typing.Any],
+        items: typing.Iterable[typing.Any],
         per_page: typing.Optional[typing.Union[int, str]] = None,
         page: typing.Optional[typing.Union[int, str]] = None,
         default_per_page: int = DEFAULT_PER_PAGE,
@@ -69,13 +136,18 @@ def from_list(
             if page is None
             else (int(page) if isinstance(page, str) and page.isdigit() and int(page) >= 1 else default_page)
         )
-        total = len(items)
-        pages = (total // per_page) + (total % per_page > 0)
-        page = min(page, pages)
-        start = (page - 1) * per_page
-        end = start + per_page
+        if isinstance(items, typing.Sequence):
+            total = len(items)
+            pages = (total // per_page) + (total % per_page > 0)
+            page = min(page, pages)
+            start = (page - 1) * per_page
+            page_items = (items[index] for index in range(max(start, 0), min(start + per_page, total)))
+        else:
+            page_items, total = cls._paginate_iterable(items, per_page=per_page, page=page)
+            pages = (total // per_page) + (total % per_page > 0)
+            page = min(page, pages)
         return cls(
-            items[start:end],
+            page_items,
             total=total,
             per_page=per_page,
             pages=pages,
@@ -84,54 +156,170 @@ def from_list(
             default_page=default_page,
         )
 
-    def to_html(self, KEY: str = "pagination", custom_kwargs: bool = False, render_template_string: bool = True) -> Markup:
-        html = """<br />
-        <div id="KEY-pagination"></div>
-        <script>
-            {% if KEY.has_prev() or KEY.has_next() %}
-                document.addEventListener("DOMContentLoaded", function () {
-                    {% if KEY.page|string != request.args.get("CUSTOM_KWARGpage", KEY.default_page|string) or KEY.per_page|string != request.args.get("CUSTOM_KWARGper_page", KEY.default_per_page|string) %}
-                        window.history.pushState({}, "", '{{ url_for_query(CUSTOM_KWARGpage=KEY.page if KEY.page != KEY.default_page else None, CUSTOM_KWARGper_page=KEY.page if KEY.per_page != KEY.default_per_page else None) }}');
-                    {% endif %}
-                    var pagination = $("#KEY-pagination").pagination({
-                        dataSource: {{ KEY.elements_numbers|tojson }},
-                        pageSize: {{ KEY.per_page }},
-                        pageNumber: {{ KEY.page }},
-                        callback: function(data, pagination) {
-                            if (pagination.pageNumber == {{ KEY.page }}) {
-                                return;
-                            }
-                            if (pagination.pageNumber == {{ KEY.default_page }}) {
-                                redirect_url = "{{ url_for_query(CUSTOM_KWARGpage=None) }}";
-                            } else {
-                                redirect_url = '{{ url_for_query(CUSTOM_KWARGpage="1234567890") }}'.replace("1234567890", pagination.pageNumber);
-                            }
-                            document.location.href = redirect_url.replace("amp;", "");
-                        },
-                        beforeSizeSelectorChange: function (event) {
-                            var newPageSize = event.target.value;
-                            if (newPageSize == {{ KEY.per_page }}) {
-                                return;
-                            }
-                            if (newPageSize == {{ KEY.default_per_page }}) {
-                                redirect_url = "{{ url_for_query(CUSTOM_KWARGpage=None, CUSTOM_KWARGper_page=None) }}";
-                            } else {
-                                redirect_url = '{{ url_for_query(CUSTOM_KWARGpage=None, CUSTOM_KWARGper_page="1234567890") }}'.replace("1234567890", newPageSize);
-                            }
-                            document.location.href = redirect_url.replace("amp;", "");
-                        },
-                        className: 'paginationjs-big paginationjs-theme-green',
-                        showSizeChanger: true,
-                        showGoInput: true,
-                        showGoButton: true,
-                        autoHidePrevious: true,
-                        autoHideNext: true,
-                        goButtonText: '{{ _("Go") }}',
-                    })
-                });
-            {% endif %}
-        </script>""".replace("KEY", KEY).replace("CUSTOM_KWARG", f"{KEY}_" if custom_kwargs else "")
-        if not render_template_string:
-            return html
-        from flask import render_template_string
-        return Markup(render_template_string(html, **{KEY: self}))
+    HTML: str = """<br />
+    <div id="KEY-pagination"></div>
+    <script>
+        {% if KEY.has_prev() or KEY.has_next() %}
+            document.addEventListener("DOMContentLoaded", function () {
+                {% if KEY.page|string != request.args.get("CUSTOM_KWARGpage", KEY.default_page|string) or KEY.per_page|string != request.args.get("CUSTOM_KWARGper_page", KEY.default_per_page|string) %}
+                    window.history.pushState({}, "", '{{ url_for_query(CUSTOM_KWARGpage=KEY.page if KEY.page != KEY.default_page else None, CUSTOM_KWARGper_page=KEY.page if KEY.per_page != KEY.default_per_page else None) }}');
+                {% endif %}
+                var pagination = $("#KEY-pagination").pagination({
+                    dataSource: function (done) {
+                        // Only the total is sent: the widget just needs as many (empty) elements.
+                        done(new Array({{ KEY.total|int }}));
+                    },
+                    pageSize: {{ KEY.per_page }},
+                    pageNumber: {{ KEY.page }},
+                    callback: function(data, pagination) {
+                        if (pagination.pageNumber == {{ KEY.page }}) {
+                            return;
+                        }
+                        if (pagination.pageNumber == {{ KEY.default_page }}) {
+                            redirect_url = "{{ url_for_query(CUSTOM_KWARGpage=None) }}";
+                        } else {
+                            redirect_url = '{{ url_for_query(CUSTOM_KWARGpage="1234567890") }}'.replace("1234567890", pagination.pageNumber);
+                        }
+                        document.location.href = redirect_url.replace("amp;", "");
+                    },
+                    beforeSizeSelectorChange: function (event) {
+                        var newPageSize = event.target.value;
+                        if (newPageSize == {{ KEY.per_page }}) {
+                            return;
+                        }
+                        if (newPageSize == {{ KEY.default_per_page }}) {
+                            redirect_url = "{{ url_for_query(CUSTOM_KWARGpage=None, CUSTOM_KWARGper_page=None) }}";
+                        } else {
+                            redirect_url = '{{ url_for_query(CUSTOM_KWARGpage=None, CUSTOM_KWARGper_page="1234567890") }}'.replace("1234567890", newPageSize);
+                        }
+                        document.location.href = redirect_url.replace("amp;", "");
+                    },
+                    className: 'paginationjs-big paginationjs-theme-green',
+                    showSizeChanger: true,
+                    showGoInput: true,
+                    showGoButton: true,
+                    autoHidePrevious: true,
+                    autoHideNext: true,
+                    goButtonText: '{{ _("Go") }}',
+                })
+            });
+        {% endif %}
+    </script>"""
+
+
+class CursorPagination(BasePagination):
+    """Cursor-based pagination system for lists: only one page of items is known, and the following one is reached with an opaque cursor."""
+
+    DEFAULT_PER_PAGE: int = 20
+
+    def __init__(self, *args, **kwargs) -> None:
+        self.cursor: typing.Optional[str] = kwargs.pop("cursor", None)
+        self.next_cursor: typing.Optional[str] = kwargs.pop("next_cursor", None)
+        self.prev_cursor: typing.Optional[str] = kwargs.pop("prev_cursor", None)
+        self.per_page: int = kwargs.pop("per_page", None)
+        self.total: typing.Optional[int] = kwargs.pop("total", None)
+        self.default_per_page: int = kwargs.pop("default_per_page", self.DEFAULT_PER_PAGE)
+        super().__init__(*args, **kwargs)
+
+    def to_dict(self) -> typing.Dict[str, typing.Any]:
+        return {
+            "items": list(self),
+            "cursor": self.cursor,
+            "next_cursor": self.next_cursor,
+            "prev_cursor": self.prev_cursor,
+            "per_page": self.per_page,
+            "total": self.total,
+            "default_per_page": self.default_per_page,
+        }
+
+    def __repr__(self) -> str:
+        return f"<CursorPagination cursor={self.cursor!r} next_cursor={self.next_cursor!r}>"
+
+    def has_prev(self) -> bool:
+        return self.cursor is not None
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @staticmethod
+    def encode_cursor(value: typing.Any) -> str:
+        return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: typing.Optional[str]) -> typing.Any:
+        if not cursor:
+            return None
+        try:
+            return json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        except (binascii.Error, ValueError):
+            return None
+
+    @classmethod
+    def is_cursor_paginated(cls, data: typing.Dict[str, typing.Any]) -> bool:
+        return "next_cursor" in data or "cursor" in data
+
+    @classmethod
+    def from_list(
+        cls,
+        items: typing.Iterable[typing.Any],
+        key: typing.Callable[[typing.Any], typing.Any],
+        per_page: typing.Optional[typing.Union[int, str]] = None,
+        cursor: typing.Optional[str] = None,
+        default_per_page: int = DEFAULT_PER_PAGE,
+    ) -> typing.Any:
+        # `items` must be sorted by `key`, which must be unique and JSON serializable: the cursor is the key of the last item of the page.
+        per_page = (
+            int(per_page)
+            if isinstance(per_page, str) and per_page.isdigit() and 1 <= int(per_page) <= max(default_per_page * 5, 100)
+            else default_per_page
+        )
+        after = cls.decode_cursor(cursor)
+        if isinstance(after, typing.List):
+            # JSON has no tuples: composite keys come back as lists.
+            after = list_to_tuple(after)
+        if isinstance(items, typing.Sequence):
+            # The page is found by bisection, so deep pages cost the same as the first one.
+            try:
+                start = bisect.bisect_right(KeysSequence(items, key), after) if after is not None else 0
+            except TypeError:
+                # A cursor decoded to another JSON type than the keys: start from the first page.
+                after, start = None, 0
+            page_items = [items[index] for index in range(start, min(start + per_page + 1, len(items)))]
+        else:
+            page_items = []
+            for item in items:
+                if after is not None:
+                    try:
+                        if key(item) <= after:
+                            continue
+                    except TypeError:
+                        after = None
+                page_items.append(item)
+                if len(page_items) > per_page:
+                    break
+        has_next = len(page_items) > per_page
+        page_items = page_items[:per_page]
+        return cls(
+            page_items,
+            cursor=cursor if after is not None else None,
+            next_cursor=cls.encode_cursor(key(page_items[-1])) if has_next else None,
+            per_page=per_page,
+            default_per_page=default_per_page,
+        )
+
+    HTML: str = """<br />
+    {% if KEY.has_prev() or KEY.has_next() %}
+        <nav id="KEY-pagination" aria-label="{{ _("Pagination") }}">
+            <ul class="pagination justify-content-center">
+                {% if KEY.has_prev() %}
+                    <li class="page-item"><a class="page-link" href="{{ url_for_query(CUSTOM_KWARGcursor=None) }}">{{ _("First") }}</a></li>
+                {% endif %}
+                {% if KEY.prev_cursor is not none %}
+                    <li class="page-item"><a class="page-link" href="{{ url_for_query(CUSTOM_KWARGcursor=KEY.prev_cursor) }}">{{ _("Previous") }}</a></li>
+                {% endif %}
+                {% if KEY.has_next() %}
+                    <li class="page-item"><a class="page-link" href="{{ url_for_query(CUSTOM_KWARGcursor=KEY.next_cursor) }}">{{ _("Next") }}</a></li>
+                {% endif %}
+            </ul>
+        </nav>
+    {% endif %}"""
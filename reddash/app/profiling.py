@@ -0,0 +1,142 @@
+import typing  # isort:skip
+
+import cProfile
+import datetime
+import functools
+import io
+import itertools
+import marshal
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import deque
+
+from flask import Flask, g, request
+from flask_login import current_user
+
+
+class Profiler:
+    """Profile the async views of single requests with cProfile, keeping the last results in memory.
+
+    Owners can profile a request with `?profile=1`, and 1 request out of `PROFILING_SAMPLE_RATE`
+    is profiled if it's set.
+    """
+
+    def __init__(self, maxlen: int = 20) -> None:
+        self.app: typing.Optional[Flask] = None
+        self.profiles: typing.Deque[typing.Dict[str, typing.Any]] = deque(maxlen=maxlen)
+        self._ids: typing.Iterator[int] = itertools.count(1)
+        # cProfile can't profile two threads at once: only one request is profiled at a time, the others run normally.
+        self._lock: threading.Lock = threading.Lock()
+        # Since Python 3.12, cProfile uses `sys.monitoring`, which sees all the threads: the calls of the requests
+        # running at the same time are mixed in the profile, so they are counted to flag it.
+        self.active_requests: int = 0
+        self._active_requests_lock: threading.Lock = threading.Lock()
+
+    def init_app(self, app: Flask) -> None:
+        self.app = app
+
+        @app.before_request
+        def start_request() -> None:
+            with self._active_requests_lock:
+                self.active_requests += 1
+            g.profiler_counted = True
+
+        @app.teardown_request
+        def end_request(exception: typing.Optional[BaseException]) -> None:
+            if g.pop("profiler_counted", False):
+                with self._active_requests_lock:
+                    self.active_requests -= 1
+
+    def get(self, profile_id: int) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        return next((profile for profile in self.profiles if profile["id"] == profile_id), None)
+
+    def should_profile(self) -> bool:
+        if "profile" not in g:
+            sample_rate = self.app.config["PROFILING_SAMPLE_RATE"]
+            g.profile = (
+                request.args.get("profile") in ("True", "true", "1")
+                and current_user.is_authenticated
+                and current_user.is_owner
+            ) or bool(sample_rate) and random.randrange(sample_rate) == 0
+        return g.profile
+
+    def wrap(self, func: typing.Callable) -> typing.Callable:
+        # Async views run in another thread with their own event loop, so the profiler is enabled inside the coroutine.
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not self._lock.acquire(blocking=False):
+                return await func(*args, **kwargs)
+            try:
+                profile, start = cProfile.Profile(), time.perf_counter()
+                try:
+                    profile.enable()
+                except ValueError:  # Another profiling tool is already active.
+                    return await func(*args, **kwargs)
+                concurrent = self.active_requests
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    profile.disable()
+                    concurrent = max(concurrent, self.active_requests) - 1
+                    self.store(
+                        profile, time.perf_counter() - start, concurrent=concurrent if sys.version_info >= (3, 12) else 0
+                    )
+            finally:
+                self._lock.release()
+
+        return wrapper
+
+    def store(self, profile: cProfile.Profile, duration: float, concurrent: int = 0) -> None:
+        profile.create_stats()
+        self.profiles.appendleft(
+            {
+                "id": next(self._ids),
+                "date": datetime.datetime.now(tz=datetime.timezone.utc),
+                "method": request.method,
+                "path": request.full_path.rstrip("?"),
+                "endpoint": request.endpoint,
+                "duration": duration,
+                "concurrent": concurrent,
+                "stats": profile.stats,
+            }
+        )
+
+    @staticmethod
+    def to_pstats(profile: typing.Dict[str, typing.Any]) -> bytes:
+        # Same format as `pstats.Stats.dump_stats`.
+        return marshal.dumps(profile["stats"])
+
+    @staticmethod
+    def to_text(profile: typing.Dict[str, typing.Any], limit: int = 40) -> str:
+        stream = io.StringIO()
+        stats = pstats.Stats(stream=stream)
+        stats.stats = profile["stats"]
+        stats.get_top_level_stats()
+        stats.sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+    @staticmethod
+    def to_collapsed(profile: typing.Dict[str, typing.Any]) -> str:
+        # cProfile doesn't keep whole stacks: the own time of each function is attributed to its most expensive callers chain.
+        stats = profile["stats"]
+
+        def label(function: typing.Tuple[str, int, str]) -> str:
+            filename, line, name = function
+            return f"{name} ({filename.rsplit('/', 1)[-1]}:{line})".replace(";", ":")
+
+        lines = []
+        for function, (__, __, tottime, __, callers) in stats.items():
+            if (microseconds := int(tottime * 1_000_000)) <= 0:
+                continue
+            stack, seen = [function], {function}
+            # Recursive calls are skipped, going up to the next most expensive caller.
+            while candidates := [caller for caller in callers if caller not in seen and caller in stats]:
+                caller = max(candidates, key=lambda c: callers[c][3])
+                stack.append(caller)
+                seen.add(caller)
+                callers = stats[caller][4]
+            lines.append(f"{';'.join(label(f) for f in reversed(stack))} {microseconds}")
+        return "\n".join(sorted(lines)) + "\n"
@@ -29,5 +29,54 @@ $.extend({
       console.error(error);
       throw error;
     }
+  },
+
+  async submitForm(form, submitter = null) {
+    // The server answers with the modified fields and the errors of each field, instead of a redirection.
+    try {
+      var response = await fetch(form.action || window.location.href, {
+        method: "POST",
+        headers: { "Accept": "application/json" },
+        body: new FormData(form, submitter)
+      });
+    } catch (error) {
+      // The request couldn't be sent at all, so the form can be submitted normally.
+      error.requestFailed = true;
+      throw error;
+    }
+    try {
+      var responseData = await response.json();
+    } catch (error) {
+      // A login redirection or an error page: the modifications may already be saved, so they aren't sent again.
+      console.error(error);
+      this.sendNotification("danger", `Unexpected answer of the server (${response.status}): reload the page to check the modifications.`);
+      return null;
+    }
+    form.querySelectorAll(".is-invalid, .is-valid").forEach((element) => element.classList.remove("is-invalid", "is-valid"));
+    Object.keys(responseData.errors || {}).forEach((name) => {
+      var element = form.querySelector(`[name="${name}"]`);
+      if (element) {
+        element.classList.add("is-invalid");
+        element.title = responseData.errors[name].join(" ");
+      }
+    });
+    (responseData.modified || []).forEach((name) => {
+      var element = form.querySelector(`[name="${name}"]`);
+      if (element) element.classList.add("is-valid");
+    });
+    (responseData.notifications || []).forEach(({ type, message }) => this.sendNotification(type, message));
+    return responseData;
   }
 });
+
+document.addEventListener("submit", function (event) {
+  var form = event.target;
+  if (!form.hasAttribute("data-submit-xhr") || event.defaultPrevented) return;
+  event.preventDefault();
+  $.submitForm(form, event.submitter).catch((error) => {
+    console.error(error);
+    if (error.requestFailed) {
+      form.submit();
+    }
+  });
+});
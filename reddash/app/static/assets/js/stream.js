@@ -0,0 +1,24 @@
+// Live updates of the dashboard, from the Server-Sent Events of `/api/stream`.
+(function () {
+  var script = document.currentScript;
+  if (!window.EventSource || !script) {
+    return;
+  }
+  var source = new EventSource(script.dataset.streamUrl);
+  source.addEventListener("rpc_state", function (event) {
+    var state = JSON.parse(event.data);
+    document.querySelectorAll("[data-stream-rpc-state]").forEach(function (element) {
+      element.textContent = state.connected ? element.dataset.connected : element.dataset.disconnected;
+    });
+  });
+  // Let the pages and the third parties react to any event.
+  ["rpc_state", "variables", "data"].forEach(function (name) {
+    source.addEventListener(name, function (event) {
+      document.dispatchEvent(new CustomEvent("reddash:" + name, { detail: JSON.parse(event.data) }));
+    });
+  });
+  // Free the server connection as soon as the page is left.
+  window.addEventListener("pagehide", function () {
+    source.close();
+  });
+})();
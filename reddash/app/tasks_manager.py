@@ -7,10 +7,11 @@
 import asyncio
 import datetime
 import threading
+import time
 
 from flask import Flask
 
-from .utils import check_for_disconnect, initialize_websocket, get_result
+from .utils import check_for_disconnect, get_result, index_custom_pages, initialize_websocket
 
 
 class TasksManager:
@@ -19,6 +20,9 @@ def __init__(self, app: Flask) -> None:
 
         self.threads: typing.List[typing.Union[threading.Thread, asyncio.Task]] = []
         self.ignore_disconnect = False
+        # Last iteration of each background task, and tasks which died, for the metrics.
+        self.heartbeats: typing.Dict[str, float] = {}
+        self.dead_tasks: typing.Set[str] = set()
 
     async def update_data_variables(
         self, method: str, once: bool = True, only_bot_variables: bool = False
@@ -27,6 +31,7 @@ async def update_data_variables(
             while True:
                 if not once:
                     await asyncio.sleep(self.app.config["WEBSOCKET_INTERVAL"])
+                    self.heartbeats[method] = time.monotonic()
                 if not self.app.running:
                     return
 
@@ -60,25 +65,102 @@ async def update_data_variables(
                 # if "result" not in result:
                 #     self.app.logger.error(f"RPC websocket returned an unexpected response: {result}")
                 #     continue
-                if method == "DASHBOARDRPC__GET_DATA":
-                    self.app.data.update(**result)
-                elif method == "DASHBOARDRPC__GET_VARIABLES":
-                    if not self.app.variables:
-                        self.app.logger.info(
-                            "Initial connection made with Red bot. Syncing data..."
-                        )
-                    self.app.variables.update(**result)
+                self.apply_result(method, result)
 
                 if once:
                     break
         except Exception:
+            self.dead_tasks.add(method)
             self.app.logger.exception(f"Background task `{method}` died unexpectedly.")
 
+    def apply_result(self, method: str, result: typing.Dict[str, typing.Any]) -> None:
+        if method == "DASHBOARDRPC__GET_DATA":
+            data, versions = self.app.data, self.app.data_versions
+        elif method == "DASHBOARDRPC__GET_VARIABLES":
+            if not self.app.variables:
+                self.app.logger.info("Initial connection made with Red bot. Syncing data...")
+            data, versions = self.app.variables, self.app.variables_versions
+        else:
+            return
+        # Bump the version of each changed key, so caches built on top of them know when to rebuild.
+        changed_keys = [
+            key for key, value in result.items() if key not in data or data[key] != value
+        ]
+        for key in changed_keys:
+            versions[key] = versions.get(key, 0) + 1
+        data.update(**result)
+        if method == "DASHBOARDRPC__GET_DATA" and "custom_pages" in changed_keys:
+            index_custom_pages(self.app)
+        if changed_keys:
+            self.publish_changes(method, changed_keys)
+
+    def publish_changes(self, method: str, changed_keys: typing.List[str]) -> None:
+        # Only data already public on the dashboard pages is published.
+        if method == "DASHBOARDRPC__GET_VARIABLES":
+            if changed := [key for key in changed_keys if key in ("commands", "third_parties")]:
+                self.app.events_broadcaster.publish("variables", {"changed": changed})
+        elif changed := [key for key in changed_keys if key in ("ui", "custom_pages", "disabled_third_parties")]:
+            self.app.events_broadcaster.publish("data", {"changed": changed})
+
+    async def forward_webhooks(self) -> None:
+        # Webhooks are acknowledged as soon as they are queued, and forwarded here one by one: the bot method takes
+        # a single payload. They are taken from the queue by batches, only to acknowledge them together in the spool file.
+        webhooks_queue = self.app.webhooks_queue
+        retry_delay: float = 1
+        try:
+            while True:
+                self.heartbeats["DASHBOARDRPC_WEBHOOKS__WEBHOOK_RECEIVE"] = time.monotonic()
+                if not self.app.running:
+                    return
+                if not self.app.config["RPC_CONNECTED"]:
+                    # No attempt is consumed while the bot is away, so a restart of the bot doesn't empty the queue.
+                    await asyncio.sleep(1)
+                    continue
+                batch = webhooks_queue.get_batch(self.app.config["WEBHOOKS_BATCH_SIZE"])
+                if not batch:
+                    await asyncio.sleep(0.5)
+                    continue
+                failed = []
+                for i, entry in enumerate(batch):
+                    request = {
+                        "jsonrpc": "2.0",
+                        "id": 0,
+                        "method": "DASHBOARDRPC_WEBHOOKS__WEBHOOK_RECEIVE",
+                        "params": [entry["payload"]],
+                    }
+                    # The lock is taken for each webhook, so the pages requests can go in between.
+                    with self.app.lock:
+                        try:
+                            result = await get_result(self.app, request, retry=False)
+                        except Exception as e:
+                            self.app.logger.error("Error sending webhook data.", exc_info=e)
+                            result = None
+                    if not result or "error" in result:
+                        # Keep the order: the rest of the batch is retried too, without having been sent.
+                        failed = batch[i:]
+                        break
+                webhooks_queue.ack(batch[: len(batch) - len(failed)])
+                if not failed:
+                    retry_delay = 1
+                    continue
+                failed[0]["attempts"] += 1
+                if failed[0]["attempts"] >= self.app.config["WEBHOOKS_MAX_ATTEMPTS"]:
+                    self.app.logger.warning("Dropping a webhook after too many failed attempts.")
+                    webhooks_queue.ack(failed[:1], dropped=True)
+                    failed = failed[1:]
+                webhooks_queue.requeue(failed)
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 60)
+        except Exception:
+            self.dead_tasks.add("DASHBOARDRPC_WEBHOOKS__WEBHOOK_RECEIVE")
+            self.app.logger.exception("Background task `DASHBOARDRPC_WEBHOOKS__WEBHOOK_RECEIVE` died unexpectedly.")
+
     async def update_version(self) -> None:
         version: int = 0
         try:
             while True:
                 await asyncio.sleep(self.app.config["WEBSOCKET_INTERVAL"])
+                self.heartbeats["DASHBOARDRPC__CHECK_VERSION"] = time.monotonic()
                 if not self.app.running:
                     return
                 if self.app.ws and self.app.ws.connected:
@@ -107,6 +189,7 @@ async def update_version(self) -> None:
                             self.ignore_disconnect: bool = False
                         version = result["version"]
         except Exception as e:
+            self.dead_tasks.add("DASHBOARDRPC__CHECK_VERSION")
             self.app.logger.exception(
                 "Background task `DASHBOARDRPC__CHECK_VERSION` died unexpectedly.", exc_info=e
             )
@@ -123,12 +206,14 @@ async def check_if_connected(self) -> None:
                 self.app.logger.info("RPC Websocket closed.")
                 return
             await asyncio.sleep(0.1)
+            self.heartbeats["check_if_connected"] = time.monotonic()
             if self.ignore_disconnect:
                 continue
             if self.app.ws and self.app.ws.connected:
                 self.app.config["RPC_CONNECTED"]: bool = True
                 if last_state_disconnected:
                     self.app.logger.info("Reconnected to RPC Websocket.")
+                    self.app.events_broadcaster.publish("rpc_state", {"connected": True})
                     self.app.config["LAST_RPC_EVENT"]: datetime.datetime = datetime.datetime.now(
                         tz=datetime.timezone.utc
                     )
@@ -137,6 +222,7 @@ async def check_if_connected(self) -> None:
                 self.app.logger.warning("Disconnected from RPC Websocket.")
                 self.app.config["RPC_CONNECTED"]: bool = False
                 last_state_disconnected = True
+                self.app.events_broadcaster.publish("rpc_state", {"connected": False})
                 self.app.config["LAST_RPC_EVENT"]: datetime.datetime = datetime.datetime.now(
                     tz=datetime.timezone.utc
                 )
@@ -174,6 +260,13 @@ def start_tasks(self) -> None:
                     daemon=True,
                 )
             )
+            self.threads.append(
+                threading.Thread(
+                    target=asyncio.run,
+                    args=[self.forward_webhooks()],
+                    daemon=True,
+                )
+            )
             for t in self.threads:
                 t.start()
         else:
@@ -187,6 +280,7 @@ def start_tasks(self) -> None:
                     self.update_data_variables("DASHBOARDRPC__GET_VARIABLES")
                 )
             )
+            self.threads.append(self.app.cog.bot.loop.create_task(self.forward_webhooks()))
 
     def stop_tasks(self) -> None:
         for t in self.threads:
@@ -1,8 +1,10 @@
 import typing  # isort:skip
 
+import json
+
 from reddash.app.app import app
 
-from flask import abort, flash, jsonify, redirect, render_template, render_template_string, url_for, request, session, g
+from flask import abort, flash, jsonify, redirect, render_template, url_for, request, session, g
 from werkzeug.exceptions import HTTPException
 from flask_babel import _
 from flask_login import current_user, login_required
@@ -12,11 +14,51 @@
 
 import base64
 
-from ..base.routes import get_guild, get_third_parties
-from ..pagination import Pagination
-from ..utils import get_result  # , get_user_id
+from ..base.routes import get_guild, get_third_parties, get_third_party_name
+from ..cache import LRUCache
+from ..pagination import CursorPagination, Pagination
+from ..utils import get_result, render_template_string  # , get_user_id
 from . import blueprint
 
+RESPONSES_CACHE: LRUCache = LRUCache("third_parties_responses", maxsize=512)
+# Bumped by `invalidate_cache` in the third parties responses, to make the previous cached responses unreachable.
+RESPONSES_GENERATIONS: typing.Dict[typing.Tuple[str, str], int] = {}
+
+
+def get_response_cache_key(
+    name: str, page: str, context_ids: typing.Dict[str, int]
+) -> typing.Optional[typing.Tuple]:
+    # Pages declare their cacheability in their registration: `"cache": {"ttl": 60, "vary_on": ["guild_id"]}`.
+    cache = app.variables["third_parties"][name][page].get("cache")
+    if request.method not in ("GET", "HEAD") or not isinstance(cache, typing.Dict) or not cache.get("ttl"):
+        return None
+    # Pages accepting forms embed the CSRF token of the user, which mustn't be served to the others.
+    if any(method not in ("GET", "HEAD") for method in app.variables["third_parties"][name][page]["methods"]):
+        return None
+    return (
+        name,
+        page,
+        RESPONSES_GENERATIONS.get((name, page), 0),
+        app.variables_versions.get("third_parties"),
+        tuple((key, context_ids.get(key)) for key in sorted(cache.get("vary_on", []))),
+        tuple(sorted(request.args.items(multi=True))),
+        str(app.extensions["babel"].locale_selector()),
+    )
+
+
+def contains_csrf_token(result: typing.Dict[str, typing.Any]) -> bool:
+    tokens = [token for token in (session.get("csrf_token"), g.get("csrf_token")) if token]
+    dumped = json.dumps(result, default=str)
+    return any(token in dumped for token in tokens)
+
+
+def invalidate_responses_cache(name: str, pages: typing.Union[bool, typing.List[str]]) -> None:
+    if pages is True:
+        pages = app.variables["third_parties"].get(name, {})
+    for page in pages:
+        page = "null" if page is None else page.lower()
+        RESPONSES_GENERATIONS[(name, page)] = RESPONSES_GENERATIONS.get((name, page), 0) + 1
+
 # <---------- Third Parties ---------->
 
 
@@ -35,17 +77,12 @@ async def webhook_route():
         request.user_agent
     )  # User agent seems adequate enough for filtering.
     payload["request_args"] = request.args.to_dict()
-    try:
-        requeststr = {
-            "jsonrpc": "2.0",
-            "id": 0,
-            "method": "DASHBOARDRPC_WEBHOOKS__WEBHOOK_RECEIVE",
-            "params": [payload],
-        }
-        with app.lock:
-            return await get_result(app, requeststr)
-    except Exception as e:
-        app.logger.error("Error sending webhook data.", exc_info=e)
+    # The bot isn't waited for: the webhook is forwarded in the background by the `TasksManager`.
+    if not app.webhooks_queue.put(payload):
+        return jsonify(
+            {"status": 1, "message": "Too many webhooks received. Try again later."}
+        ), 503, {"Retry-After": "30"}
+    return jsonify({"status": 0, "message": "Webhook received."}), 202
 
 
 @blueprint.route("/third_party/callback/<provider>")
@@ -151,7 +188,7 @@ async def third_party(name: str, page: str = None, guild_id: str = None):
     third_parties = app.variables["third_parties"]
     name = name.strip()
     if name not in third_parties:
-        name = next((key for key in third_parties if key.lower() == name.lower()), None)
+        name = get_third_party_name(name)
         if name is None:
             return abort(
                 404, description=_("Looks like that third party doesn't exist... Strange...")
@@ -217,6 +254,9 @@ async def third_party(name: str, page: str = None, guild_id: str = None):
     
     try:
         generate_csrf()
+        cache_key = get_response_cache_key(name, _page, context_ids)
+        if cache_key is not None and (result := RESPONSES_CACHE.get(cache_key)) is not None:
+            return render_third_party_result(name, page, return_guild, result)
         requeststr = {
             "jsonrpc": "2.0",
             "id": 0,
@@ -239,51 +279,19 @@ async def third_party(name: str, page: str = None, guild_id: str = None):
         with app.lock:
             result = await get_result(app, requeststr)
 
-        if "data" in result:
-            return result["data"]
-        if "notifications" in result:
-            for notification in result["notifications"]:
-                flash(notification["message"], category=notification["category"])
-        if "web_content" in result:
-            for key, value in result["web_content"].items():
-                if isinstance(value, typing.Dict) and "items" in value:
-                    result["web_content"][key]: Pagination = Pagination(
-                        value.pop("items"),
-                        **value,
-                    )
-                    result["web_content"]["source"] += "\n\n" + result["web_content"][key].to_html(key, render_template_string=False)
-            if result["web_content"].get("standalone", False):
-                return render_template_string(
-                    name=name, page=page, **return_guild, **result["web_content"]
-                )
-            return render_template(
-                "pages/third_parties/third_party.html",
-                name=name,
-                page=page,
-                **return_guild,
-                expanded=result["web_content"].get("expanded", False),
-                fullscreen=result["web_content"].get("fullscreen", False),
-                source_content=render_template_string(
-                    result["web_content"].pop("source"),
-                    name=name, page=page,
-                    **return_guild,
-                    **result["web_content"],
-                ),
-            )
-        elif "error_code" in result:
-            return abort(result["error_code"], description=result.get("error_message"))
-        elif "error_title" in result:
-            return render_template(
-                "errors/custom.html",
-                error_title=result["error_title"],
-                error_message=result.get("error_message"),
+        if result.get("invalidate_cache"):
+            invalidate_responses_cache(name, result["invalidate_cache"])
+        if (
+            cache_key is not None
+            and ("data" in result or "web_content" in result)
+            and "notifications" not in result
+            and not result.get("invalidate_cache")
+            and not contains_csrf_token(result)
+        ):
+            RESPONSES_CACHE.set(
+                cache_key, result, ttl=third_parties[name][_page]["cache"]["ttl"]
             )
-        elif "redirect_url" in result:
-            # `url_has_allowed_host_and_scheme`` should check if the url is safe for redirects, meaning it matches the request host.
-            if not url_has_allowed_host_and_scheme(result["redirect_url"], request.host):
-                return abort(400)
-            return redirect(result["redirect_url"])
-        return result
+        return render_third_party_result(name, page, return_guild, result)
     except HTTPException:
         raise
     except Exception as e:
@@ -291,3 +299,58 @@ async def third_party(name: str, page: str = None, guild_id: str = None):
             f"Error in the page `{page or 'Main Page'}` of the third party `{name}`.", exc_info=e
         )
         return abort(500, description=_("An error occurred while processing your request."))
+
+
+def render_third_party_result(
+    name: str, page: typing.Optional[str], return_guild: typing.Dict, result: typing.Dict
+):
+    # `result` may be shared with the responses cache, so it's never mutated here.
+    if "data" in result:
+        return result["data"]
+    if "notifications" in result:
+        for notification in result["notifications"]:
+            flash(notification["message"], category=notification["category"])
+    if "web_content" in result:
+        web_content = result["web_content"].copy()
+        for key, value in result["web_content"].items():
+            if isinstance(value, typing.Dict) and "items" in value:
+                pagination_cls = (
+                    CursorPagination if CursorPagination.is_cursor_paginated(value) else Pagination
+                )
+                web_content[key]: typing.Union[Pagination, CursorPagination] = pagination_cls(
+                    value["items"],
+                    **{k: v for k, v in value.items() if k != "items"},
+                )
+                web_content["source"] += "\n\n" + web_content[key].to_html(key, render_template_string=False)
+        if web_content.get("standalone", False):
+            return render_template_string(
+                name=name, page=page, **return_guild, **web_content
+            )
+        return render_template(
+            "pages/third_parties/third_party.html",
+            name=name,
+            page=page,
+            **return_guild,
+            expanded=web_content.get("expanded", False),
+            fullscreen=web_content.get("fullscreen", False),
+            source_content=render_template_string(
+                web_content.pop("source"),
+                name=name, page=page,
+                **return_guild,
+                **web_content,
+            ),
+        )
+    elif "error_code" in result:
+        return abort(result["error_code"], description=result.get("error_message"))
+    elif "error_title" in result:
+        return render_template(
+            "errors/custom.html",
+            error_title=result["error_title"],
+            error_message=result.get("error_message"),
+        )
+    elif "redirect_url" in result:
+        # `url_has_allowed_host_and_scheme`` should check if the url is safe for redirects, meaning it matches the request host.
+        if not url_has_allowed_host_and_scheme(result["redirect_url"], request.host):
+            return abort(400)
+        return redirect(result["redirect_url"])
+    return result
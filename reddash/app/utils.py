@@ -2,9 +2,14 @@
 
 import base64
 import datetime
+import functools
+import gzip
+import hashlib
 import json
 import os
+import threading
 import time
+import zlib
 from copy import deepcopy
 from importlib import import_module
 from urllib.parse import parse_qs, quote_plus, urlencode, urlparse, urlunparse
@@ -13,7 +18,19 @@
 import websocket
 from django.conf import settings
 from fernet import Fernet
-from flask import Flask, flash, g, redirect, render_template, request, session, url_for
+from flask import (
+    Flask,
+    Response,
+    flash,
+    g,
+    get_flashed_messages,
+    redirect,
+    render_template,
+    request,
+    session,
+    stream_template,
+    url_for,
+)
 from flask_babel import Locale, _
 from flask_bootstrap import Bootstrap
 from flask_login import LoginManager, UserMixin, current_user
@@ -21,20 +38,28 @@
 from flask_moment import Moment
 from flask_sitemapper import Sitemapper
 from flask_talisman import Talisman
-from flask_wtf.csrf import CSRFProtect
-from flask_wtf.file import FileAllowed, FileField, MultipleFileField
-from wtforms import Field, SelectFieldBase, FormField
+from flask_wtf.csrf import CSRFProtect, generate_csrf
 from fuzzywuzzy import process
+from jinja2 import Template, TemplateError
 from markdown import Markdown
 from pygments import highlight
 from pygments.formatters import HtmlFormatter
+from pygments.lexer import Lexer
 from pygments.lexers import Python3TracebackLexer, get_lexer_by_name
 import bleach
 from markupsafe import Markup
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 settings.configure()
 from django_user_agents.utils import get_user_agent
 
+from .cache import LRUCache
+from .metrics import record_timing
+
 AVAILABLE_COLORS: typing.List[str] = [
     "success",
     "warning",
@@ -46,6 +71,20 @@
 
 app: Flask = None
 
+COMPRESSIBLE_EXTENSIONS: typing.Tuple[str, ...] = (
+    ".css",
+    ".js",
+    ".map",
+    ".svg",
+    ".txt",
+    ".json",
+    ".ttf",
+    ".eot",
+)
+# Variants written in the static folder by the older versions.
+COMPRESSED_EXTENSIONS: typing.Tuple[str, ...] = (".gz", ".br", ".tmp")
+STREAM_BUFFER_SIZE: int = 8 * 1024
+
 WS_URL = "ws://localhost:"
 WS_EXCEPTIONS = (
     ConnectionRefusedError,
@@ -154,6 +193,140 @@ def get_user_from_token(
 
 current_user: User
 
+_commands_choices: typing.Tuple[
+    typing.Optional[int], typing.Tuple[typing.Tuple[str, str], ...]
+] = (None, ())
+
+
+def get_commands_choices() -> typing.Tuple[typing.Tuple[str, str], ...]:
+    """Flattened and sorted choices of the non-owner commands, rebuilt only when they change."""
+    global _commands_choices
+    version = app.variables_versions.get("commands", 0)
+    cached_version, choices = _commands_choices
+    if cached_version == version:
+        return choices
+
+    available_commands = []
+
+    def check_subs(subs):
+        for sub in subs:
+            if sub["privilege_level"] == "BOT_OWNER":
+                continue
+            available_commands.append((sub["name"], sub["name"]))
+            if sub["subs"]:
+                check_subs(sub["subs"])
+
+    for cog_data in app.variables["commands"].values():
+        for command in cog_data["commands"]:
+            if command["privilege_level"] == "BOT_OWNER" or command["name"] == "command":
+                continue
+            available_commands.append((command["name"], command["name"]))
+            check_subs(command["subs"])
+    choices = tuple(sorted(available_commands))
+    _commands_choices = (version, choices)
+    return choices
+
+
+# `Markdown` instances keep state between conversions, so each thread gets its own.
+_markdown_converters: threading.local = threading.local()
+MARKDOWN_CACHE: LRUCache = LRUCache("markdown", maxsize=2048)
+
+
+def render_markdown(text: str) -> Markup:
+    key = hashlib.sha1(text.encode()).digest()
+    if (html := MARKDOWN_CACHE.get(key)) is not None:
+        return html
+    if (converter := getattr(_markdown_converters, "converter", None)) is None:
+        converter = _markdown_converters.converter = Markdown()
+    text = bleach.clean(text, tags=[], strip=False)
+    html = Markup(converter.reset().convert(text).replace("\n", ""))  # <br />
+    MARKDOWN_CACHE.set(key, html)
+    return html
+
+
+HIGHLIGHT_FORMATTER: HtmlFormatter = HtmlFormatter()
+HIGHLIGHT_CSS: str = HIGHLIGHT_FORMATTER.get_style_defs(".highlight")
+HIGHLIGHT_CACHE: LRUCache = LRUCache("highlight", maxsize=512)
+
+
+@functools.lru_cache(maxsize=64)
+def get_lexer(language: str) -> Lexer:
+    if language == "traceback":
+        return Python3TracebackLexer()
+    return get_lexer_by_name(language, stripall=True)
+
+
+def render_highlight(code: str, language: str = "python") -> Markup:
+    key = (language, hashlib.sha1(code.encode()).digest())
+    if (html := HIGHLIGHT_CACHE.get(key)) is not None:
+        return html
+    code = bleach.clean(code, tags=[], strip=False).replace("&lt;", "<").replace("&gt;", ">")
+    html = Markup(highlight(code, get_lexer(language), HIGHLIGHT_FORMATTER))
+    HIGHLIGHT_CACHE.set(key, html)
+    return html
+
+
+TEMPLATES_CACHE: LRUCache = LRUCache("templates", maxsize=256)
+MAX_CACHED_TEMPLATE_SIZE: int = 256 * 1024
+
+
+def get_template_from_string(source: str) -> Template:
+    # Third parties send the same sources again and again, so don't parse and compile them each time.
+    if len(source) > MAX_CACHED_TEMPLATE_SIZE:
+        return app.jinja_env.from_string(source)
+    key = hashlib.sha1(source.encode()).digest()
+    if (template := TEMPLATES_CACHE.get(key)) is None:
+        template = app.jinja_env.from_string(source)
+        TEMPLATES_CACHE.set(key, template)
+    return template
+
+
+def render_template_string(source: str, **context) -> str:
+    return render_template(get_template_from_string(source), **context)
+
+
+def render_template_stream(template_name: str, **context) -> Response:
+    # The session is saved before the body is sent, so pop the flashed messages and
+    # generate the CSRF token now instead of while the template is rendering.
+    get_flashed_messages()
+    generate_csrf()
+    stream = stream_template(template_name, **context)
+    compress = request.accept_encodings["gzip"] > 0
+
+    def generate() -> typing.Iterator[bytes]:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+        buffer = []
+        buffer_size = 0
+        for chunk in stream:
+            buffer.append(chunk)
+            buffer_size += len(chunk)
+            if buffer_size < STREAM_BUFFER_SIZE:
+                continue
+            data = "".join(buffer).encode()
+            buffer, buffer_size = [], 0
+            yield compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH) if compress else data
+        data = "".join(buffer).encode()
+        yield compressor.compress(data) + compressor.flush() if compress else data
+
+    response = Response(generate(), mimetype="text/html")
+    if compress:
+        response.content_encoding = "gzip"
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def index_custom_pages(app: Flask) -> None:
+    # Custom pages are indexed by URL and prerendered once per sync, not on each request.
+    custom_pages = {}
+    for custom_page in app.data.get("custom_pages") or []:
+        custom_page = dict(custom_page.items())
+        custom_page["html"] = render_markdown(custom_page["content"])
+        custom_page["etag"] = hashlib.sha1(
+            f"{custom_page['title']}\n{custom_page['content']}".encode()
+        ).hexdigest()
+        custom_pages[custom_page["url"]] = custom_page
+    app.custom_pages = custom_pages
+
 
 def register_extensions(_app: Flask) -> None:
     global app
@@ -223,82 +396,25 @@ def protect():
         g.csrf_valid = False
 
     app.csrf_protect.protect = protect
-    initial_init_field = Field.__init__
-
-    def init_field(field, *args, **kwargs):
-        initial_init_field(field, *args, **kwargs)
-        if isinstance(field, FormField):
-            return
-        if hasattr(field, "_value"):
-            field._real_value = field._value
-        field._value = lambda: (field._real_value() if hasattr(field, "_real_value") else "") or (
-            (field.default if isinstance(field.default, typing.List) else str(field.default))
-            if field.default is not None
-            else ""
-        )
-        if isinstance(field, SelectFieldBase):
-            old_choices_generator = field._choices_generator
-
-            def _choices_generator(choices):
-                for value, label, selected, render_kw in old_choices_generator(choices):
-                    yield (
-                        bleach.clean(value, tags=[], strip=False) if value is not None else None,
-                        bleach.clean(label, tags=[], strip=False),
-                        selected
-                        or (
-                            field.coerce(value) == field._value()
-                            if not isinstance(field._value(), typing.List)
-                            else field.coerce(value) in field._value()
-                        ),
-                        render_kw,
-                    )
-
-            field._choices_generator = _choices_generator
-        elif isinstance(field, (FileField, MultipleFileField)):
-            if (
-                file_allowed := next(
-                    (
-                        validator
-                        for validator in field.validators
-                        if isinstance(validator, FileAllowed)
-                    ),
-                    None,
-                )
-            ) is not None:
-                field.flags.accept = ", ".join(
-                    [f".{extension}" for extension in file_allowed.upload_set]
-                )
-
-    Field.__init__ = init_field
-
     app.bootstrap: Bootstrap = Bootstrap()
     app.bootstrap.init_app(app)
 
     app.moment: Moment = Moment()
     app.moment.init_app(app)
 
-    app.markdown: Markdown = Markdown()
-
     @app.template_filter("markdown")
     def markdown_filter(text: str) -> Markup:
-        text = bleach.clean(text, tags=[], strip=False)
-        return Markup(app.markdown.convert(text).replace("\n", ""))  # <br />
+        return render_markdown(text)
 
     @app.template_filter("highlight")
     def highlight_filter(code, language="python") -> Markup:
-        code = bleach.clean(code, tags=[], strip=False).replace("&lt;", "<").replace("&gt;", ">")
-        if language == "traceback":
-            lexer = Python3TracebackLexer()
-        else:
-            lexer = get_lexer_by_name(language, stripall=True)
-        formatter = HtmlFormatter()
-        return Markup(highlight(code, lexer, formatter))
+        return render_highlight(code, language=language)
 
     app.site_mapper: Sitemapper = Sitemapper(https=not app.testing)
 
 
 def register_blueprints(app: Flask) -> None:
-    for module_name in ("base", "login", "third_parties"):
+    for module_name in ("base", "login", "third_parties", "api"):
         module = import_module(f"reddash.app.{module_name}.routes")
         app.register_blueprint(module.blueprint)
 
@@ -333,7 +449,7 @@ def block_ip():
             return redirect(url_for("login_blueprint.blacklisted"))
         if (
             app.locked
-            and not current_user.is_owner
+            and not (current_user.is_authenticated and current_user.is_owner)
             and not request.path.startswith("/static")
             and request.blueprint != "login_blueprint"
             and request.endpoint
@@ -342,6 +458,9 @@ def block_ip():
                 "base_blueprint.sitemap",
                 "base_blueprint.robots",
                 "base_blueprint.credits",
+                "base_blueprint.highlight_css",
+                # Checks its own authorization, for the scrapers.
+                "api_blueprint.metrics",
             )
             and not (request.path.startswith("/set") and request.path.count("/") == 1)
         ):
@@ -349,23 +468,107 @@ def block_ip():
             return redirect(url_for("base_blueprint.index", next=request.url))
 
 
+def build_assets_manifest(static_folder: str) -> typing.Dict[str, str]:
+    # Content hash of each static file, appended to its URL so it can be cached forever.
+    manifest = {}
+    for root, __, files in os.walk(static_folder):
+        for file in files:
+            if file.endswith(COMPRESSED_EXTENSIONS):
+                continue
+            path = os.path.join(root, file)
+            with open(path, "rb") as f:
+                file_hash = hashlib.sha1(f.read()).hexdigest()[:12]
+            manifest[os.path.relpath(path, static_folder).replace(os.sep, "/")] = file_hash
+    return manifest
+
+
+def compress_assets(
+    static_folder: str, compressed_folder: str, manifest: typing.Dict[str, str]
+) -> typing.Dict[str, typing.Dict[str, str]]:
+    # `.gz` and `.br` variants of the assets, so they are never compressed per request. They are written to the instance
+    # folder, as the package may be installed read-only, and named after the content hash, so an upgrade can't serve stale ones.
+    compressors = {"gzip": (".gz", functools.partial(gzip.compress, compresslevel=9, mtime=0))}
+    if brotli is not None:
+        compressors["br"] = (".br", functools.partial(brotli.compress, quality=11))
+    compressed_assets = {encoding: {} for encoding in compressors}
+    try:
+        os.makedirs(compressed_folder, exist_ok=True)
+    except OSError:
+        return compressed_assets
+    for filename, file_hash in manifest.items():
+        if not filename.endswith(COMPRESSIBLE_EXTENSIONS):
+            continue
+        data = None
+        for encoding, (extension, compress) in compressors.items():
+            compressed_filename = f"{filename.replace('/', '__')}.{file_hash}{extension}"
+            compressed_path = os.path.join(compressed_folder, compressed_filename)
+            try:
+                if not os.path.isfile(compressed_path):
+                    if data is None:
+                        with open(os.path.join(static_folder, filename), "rb") as f:
+                            data = f.read()
+                    compressed_data = compress(data)
+                    if len(compressed_data) >= len(data):
+                        continue
+                    with open(f"{compressed_path}.tmp", "wb") as f:
+                        f.write(compressed_data)
+                    os.replace(f"{compressed_path}.tmp", compressed_path)
+            except OSError:
+                continue
+            compressed_assets[encoding][filename] = compressed_filename
+    # The variants of the previous versions of the assets are removed.
+    kept = {compressed_filename for variants in compressed_assets.values() for compressed_filename in variants.values()}
+    for file in os.listdir(compressed_folder):
+        if file not in kept:
+            try:
+                os.remove(os.path.join(compressed_folder, file))
+            except OSError:
+                pass
+    return compressed_assets
+
+
 def apply_themes(app: Flask) -> None:
+    app.assets_manifest = build_assets_manifest(app.static_folder)
+    app.compressed_assets = compress_assets(
+        app.static_folder, os.path.join(app.instance_path, "compressed_static"), app.assets_manifest
+    )
+
     @app.context_processor
     def override_url_for() -> typing.Dict[str, str]:
         return dict(url_for=_generate_url_for_theme)
 
+    @functools.lru_cache(maxsize=1024)
+    def _resolve_theme_file(themename: str, filename: str) -> str:
+        theme_file = "{}/{}".format(themename, filename)
+        if os.path.isfile(os.path.join(app.static_folder, theme_file)):
+            return theme_file
+        return filename
+
     def _generate_url_for_theme(endpoint, **values) -> str:
         if endpoint.endswith("static"):
             themename = values.get("theme", None) or app.config.get("DEFAULT_THEME", None)
             if themename:
-                theme_file = "{}/{}".format(themename, values.get("filename", ""))
-                if os.path.isfile(os.path.join(app.static_folder, theme_file)):
-                    values["filename"] = theme_file
-            values["q"] = time.time()  # So Flask doesn't cache.
+                values["filename"] = _resolve_theme_file(themename, values.get("filename", ""))
+            if (file_hash := app.assets_manifest.get(values.get("filename"))) is not None:
+                values["v"] = file_hash
         if request.args.get("debug_toolbar") in ("True", "true", "1", "t", "on"):
             values["debug_toolbar"] = "True"
         return url_for(endpoint, **values)
 
+    @app.after_request
+    def cache_fingerprinted_assets(response: Response) -> Response:
+        if (
+            request.endpoint == "static"
+            and response.status_code in (200, 304)
+            and request.args.get("v") is not None
+            and request.args["v"] == app.assets_manifest.get(request.view_args.get("filename"))
+        ):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = 60 * 60 * 24 * 365
+            response.cache_control.immutable = True
+        return response
+
 
 def add_constants(app: Flask) -> None:
     default_color = app.data["ui"]["meta"]["default_color"]
@@ -423,12 +626,12 @@ def process_sidenav() -> typing.List[typing.Dict]:
             item["active"] = request.endpoint == item["route"]
             final.append(item)
 
-        if app.data["custom_pages"]:
+        if app.custom_pages:
             index = next(
                 (index for index, item in enumerate(final) if item["route"] == "base_blueprint.credits"),
                 None,
             )
-            for custom_page in app.data["custom_pages"]:
+            for custom_page in app.custom_pages.values():
                 custom_page = {
                     "name": custom_page["title"],
                     "icon": "fa fa-file-text",
@@ -446,9 +649,12 @@ def process_sidenav() -> typing.List[typing.Dict]:
         return final
 
     def url_for_query(_anchor: typing.Optional[str] = None, **kwargs) -> Markup:
-        full_url = request.url
-        url_components = urlparse(full_url)
-        query_params = parse_qs(url_components.query)
+        # Pagination widgets call this several times each, so the current URL is only parsed once per request.
+        if "parsed_url" not in g:
+            g.parsed_url = urlparse(request.url)
+            g.parsed_query = parse_qs(g.parsed_url.query)
+        url_components = g.parsed_url
+        query_params = dict(g.parsed_query)
         query_params.update(kwargs)
         for kwarg, value in query_params.copy().items():
             if value is None or value == "None":
@@ -541,6 +747,15 @@ def inject_variables() -> typing.Dict[str, typing.Any]:
         )
 
 
+def precompile_templates(app: Flask) -> None:
+    # Compile all the templates at boot (from the bytecode cache if possible), not on first use.
+    for template_name in app.jinja_env.list_templates(extensions=("html",)):
+        try:
+            app.jinja_env.get_template(template_name)
+        except TemplateError as e:
+            app.logger.warning(f"Failed to precompile the template `{template_name}`.", exc_info=e)
+
+
 def initialize_babel(app: Flask) -> None:
     app.config["BABEL_TRANSLATION_DIRECTORIES"]: str = "translations"
     app.config["LANGUAGES"]: typing.List[str] = [
@@ -646,12 +861,22 @@ def check_for_disconnect(app: Flask, method: str, result: typing.Dict[str, typin
 
 
 async def get_result(app: Flask, request: typing.Dict[str, typing.Any], *, retry: bool = True) -> typing.Dict[str, typing.Any]:
+    start = time.perf_counter()
+    try:
+        return await _get_result(app, request, retry=retry)
+    finally:
+        duration = time.perf_counter() - start
+        app.metrics.observe_rpc(request["method"], duration)
+        record_timing("rpc", duration)
+
+
+async def _get_result(app: Flask, request: typing.Dict[str, typing.Any], *, retry: bool = True) -> typing.Dict[str, typing.Any]:
     if app.cog is not None:
         from aiohttp_json_rpc.protocol import JsonRpcMsg, JsonRpcMsgTyp
         try:
             method = app.cog.bot.rpc._rpc.methods[request["method"]]
         except KeyError:
-            return {"status": 1, "error": _("Not connected to bot.")}
+            return {"status": 1, "error": _("Not connected to bot."), "method_not_found": True}
         return await method(
             http_request="GET",
             rpc=app.cog.bot.rpc._rpc,
@@ -667,10 +892,11 @@ async def get_result(app: Flask, request: typing.Dict[str, typing.Any], *, retry
         if app.ws:
             app.ws.close()
         initialize_websocket(app)
-        return await get_result(app, request, retry=False)
+        return await _get_result(app, request, retry=False)
     if "error" in result:
         if result["error"]["message"] == "Method not found":
-            return {"status": 1, "error": _("Not connected to bot.")}
+            # Also returned by the bots with an older version of the cog, to fall back on other methods.
+            return {"status": 1, "error": _("Not connected to bot."), "method_not_found": True}
         app.logger.error(result["error"])
         return {"status": 1, "error": _("Something went wrong.")}
     if not result["result"] or isinstance(result["result"], typing.Dict) and result["result"].get("disconnected", False):
@@ -0,0 +1,149 @@
+import typing  # isort:skip
+
+import json
+import logging
+import os
+import threading
+from collections import deque
+
+
+class WebhooksQueue:
+    """Bounded queue of the received webhooks, waiting to be forwarded to the bot by the `TasksManager`.
+
+    If a spool file is provided, every accepted webhook is appended to it, and the offset of the
+    acknowledged ones is kept next to it: pending webhooks survive a restart (at least once), and the
+    forwarded ones aren't replayed. The webhooks are acknowledged in order, so the acknowledged ones
+    are always the start of the file, which is compacted once it gets too long.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1000,
+        spool_path: typing.Optional[str] = None,
+        logger: typing.Optional[logging.Logger] = None,
+    ) -> None:
+        self.maxsize: int = maxsize
+        self.spool_path: typing.Optional[str] = spool_path
+        self.logger: logging.Logger = logger or logging.getLogger("reddash")
+        self.accepted: int = 0
+        self.rejected: int = 0
+        self.forwarded: int = 0
+        self.dropped: int = 0
+
+        self._entries: typing.Deque[typing.Dict[str, typing.Any]] = deque()
+        self._in_flight: int = 0
+        self._lock: threading.Lock = threading.Lock()
+        self._spool: typing.Optional[typing.BinaryIO] = None
+        # Bytes ever written to the spool file, and the ones dropped from its start by the compactions: the entries
+        # keep their end in this count, so they don't have to be updated at each compaction.
+        self._spool_written: int = 0
+        self._spool_base: int = 0
+        self._spool_acked: int = 0
+        self._spool_acked_entries: int = 0
+        if self.spool_path is not None:
+            self._load_spool()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def offset_path(self) -> str:
+        return f"{self.spool_path}.offset"
+
+    def _load_spool(self) -> None:
+        try:
+            with open(self.offset_path, "r", encoding="utf-8") as f:
+                offset = int(f.read() or 0)
+        except (OSError, ValueError):
+            offset = 0
+        payloads = []
+        if os.path.exists(self.spool_path):
+            with open(self.spool_path, "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    try:
+                        payloads.append(json.loads(line))
+                    except ValueError:
+                        self.logger.warning("Ignoring a corrupted line in the webhooks spool file.")
+        if len(payloads) > self.maxsize:
+            self.logger.warning(
+                f"Dropping {len(payloads) - self.maxsize} webhooks of the spool file, beyond the queue size."
+            )
+            self.dropped += len(payloads) - self.maxsize
+            del payloads[self.maxsize :]
+        # Rewritten with the pending webhooks only, from a clean state.
+        with open(f"{self.spool_path}.tmp", "wb") as f:
+            for payload in payloads:
+                self._spool_written += f.write(json.dumps(payload).encode() + b"\n")
+                self._entries.append({"payload": payload, "attempts": 0, "spool_end": self._spool_written})
+        os.replace(f"{self.spool_path}.tmp", self.spool_path)
+        self._spool = open(self.spool_path, "ab")
+        self._write_offset(0)
+        if self._entries:
+            self.logger.info(f"Loaded {len(self._entries)} pending webhooks from the spool file.")
+
+    def _write_offset(self, offset: int) -> None:
+        with open(self.offset_path, "w", encoding="utf-8") as f:
+            f.write(str(offset))
+
+    def _compact_spool(self) -> None:
+        # Only the pending webhooks are kept, dropping the acknowledged ones.
+        with open(self.spool_path, "rb") as f:
+            f.seek(self._spool_acked - self._spool_base)
+            pending = f.read()
+        with open(f"{self.spool_path}.tmp", "wb") as f:
+            f.write(pending)
+        self._spool.close()
+        os.replace(f"{self.spool_path}.tmp", self.spool_path)
+        self._spool = open(self.spool_path, "ab")
+        self._write_offset(0)
+        self._spool_base = self._spool_acked
+        self._spool_acked_entries = 0
+
+    def put(self, payload: typing.Dict[str, typing.Any]) -> bool:
+        with self._lock:
+            if len(self._entries) >= self.maxsize:
+                self.rejected += 1
+                return False
+            entry = {"payload": payload, "attempts": 0}
+            if self._spool is not None:
+                self._spool_written += self._spool.write(json.dumps(payload).encode() + b"\n")
+                self._spool.flush()
+                entry["spool_end"] = self._spool_written
+            self._entries.append(entry)
+            self.accepted += 1
+            return True
+
+    def get_batch(self, size: int) -> typing.List[typing.Dict[str, typing.Any]]:
+        with self._lock:
+            batch = [self._entries.popleft() for _ in range(min(size, len(self._entries)))]
+            self._in_flight += len(batch)
+            return batch
+
+    def ack(self, entries: typing.List[typing.Dict[str, typing.Any]], dropped: bool = False) -> None:
+        with self._lock:
+            self._in_flight -= len(entries)
+            if dropped:
+                self.dropped += len(entries)
+            else:
+                self.forwarded += len(entries)
+            if self._spool is None or not entries:
+                return
+            self._spool_acked = entries[-1]["spool_end"]
+            self._spool_acked_entries += len(entries)
+            if not self._entries and not self._in_flight:
+                self._spool.truncate(0)
+                self._write_offset(0)
+                self._spool_base = self._spool_acked
+                self._spool_acked_entries = 0
+            elif self._spool_acked_entries >= self.maxsize:
+                self._compact_spool()
+            else:
+                self._write_offset(self._spool_acked - self._spool_base)
+
+    def requeue(self, entries: typing.List[typing.Dict[str, typing.Any]]) -> None:
+        # Failed entries go back at the front, even if the queue is full, to keep the order.
+        with self._lock:
+            self._in_flight -= len(entries)
+            for entry in reversed(entries):
+                self._entries.appendleft(entry)
@@ -0,0 +1,128 @@
+import typing  # isort:skip
+
+import atexit
+import copy
+import datetime
+import json
+import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+import rich
+from rich import logging as rich_logging
+from rich.style import Style
+from rich.theme import Theme
+
+LOG_FORMATS: typing.Tuple[str, ...] = ("rich", "plain", "json")
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log collectors."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": datetime.datetime.fromtimestamp(record.created, tz=datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data)
+
+
+class RateLimitFilter(logging.Filter):
+    """Let at most `rate` identical warnings or errors through per `per` seconds (reconnection storms...)."""
+
+    def __init__(self, rate: int = 5, per: float = 60) -> None:
+        super().__init__()
+        self.rate: int = rate
+        self.per: float = per
+        self._windows: typing.Dict[typing.Tuple[str, int, str], typing.List[typing.Union[float, int]]] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            # [window start, messages in the window, suppressed messages]
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.per:
+                suppressed = window[2] if window is not None else 0
+                # Re-inserted, so the windows stay ordered by their start.
+                self._windows.pop(key, None)
+                self._windows[key] = [now, 1, 0]
+                self._prune(now)
+                if suppressed:
+                    record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+                return True
+            self._prune(now)
+            if window[1] < self.rate:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+    def _prune(self, now: float) -> None:
+        # Expired windows are dropped, so messages with variable parts don't grow the dict forever.
+        # The count of suppressed messages of a window is lost with it, if the message doesn't come back in time.
+        while self._windows:
+            key, window = next(iter(self._windows.items()))
+            if now - window[0] < self.per:
+                break
+            del self._windows[key]
+
+
+class LocalQueueHandler(QueueHandler):
+    """Only merge the message arguments on the calling thread: formatting, tracebacks included, happens in the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def setup_logging(log_format: str = "rich") -> QueueListener:
+    if log_format == "rich":
+        rich_console = rich.get_console()
+        rich_console.push_theme(
+            Theme(
+                {
+                    "log.time": Style(dim=True),
+                    "logging.level.warning": Style(color="yellow"),
+                    "logging.level.critical": Style(color="white", bgcolor="red"),
+                    "logging.level.verbose": Style(color="magenta", italic=True, dim=True),
+                    "logging.level.trace": Style(color="white", italic=True, dim=True),
+                    "repr.number": Style(color="cyan"),
+                    "repr.url": Style(underline=True, italic=True, bold=False, color="cyan"),
+                }
+            )
+        )
+        handler = rich_logging.RichHandler(console=rich_console, rich_tracebacks=True)
+        handler.setFormatter(
+            logging.Formatter("[{asctime}] {name}: {message}", datefmt="%Y-%m-%d %H:%M:%S", style="{")
+        )
+    else:
+        handler = logging.StreamHandler()
+        handler.setFormatter(
+            JsonFormatter()
+            if log_format == "json"
+            else logging.Formatter(
+                "[{asctime}] {levelname} {name}: {message}", datefmt="%Y-%m-%d %H:%M:%S", style="{"
+            )
+        )
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = LocalQueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter())
+    logging.basicConfig(handlers=[queue_handler])
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener